@@ -1,8 +1,31 @@
 import numpy as np
-import random
+import time
+from collections import OrderedDict
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # Optional: candidate lists fall back to a blocked brute-force search
+    cKDTree = None
+
+import kernels
+from profiling import Profiler
+from strategies import make_strategy
+
+INITIAL_PHEROMONE = 0.1
+# Neighbour list size for local search when candidate lists are off
+LOCAL_SEARCH_NEIGHBOURS = 10
+LOCAL_SEARCH_MOVES = {
+    '2-opt': ('2-opt',),
+    'or-opt': ('or-opt',),
+    '2-opt+or-opt': ('2-opt', 'or-opt'),
+}
 
 class ACO:
-    def __init__(self, num_cities, num_ants, alpha, beta, evaporation_rate, q, width, height, grid_spacing=None):
+    def __init__(self, num_cities, num_ants, alpha, beta, evaporation_rate, q, width, height, grid_spacing=None, vectorized=True, candidate_k=None,
+                 distance_dtype=np.float64, lazy_distances=False, distance_cache_rows=1024,
+                 pheromone_storage='dense', cities=None, distances=None, distance_metric=None,
+                 neighbours=None, workers=1, local_search=None, local_search_ants=None,
+                 strategy=None, backend='auto', rng=None, profile=False, pheromones=None, stopping=None):
         self.num_cities = num_cities
         self.num_ants = num_ants
         self.alpha = alpha
@@ -12,15 +35,86 @@ class ACO:
         self.width = width
         self.height = height
         self.grid_spacing = grid_spacing
+        # Every random choice (city generation, tour construction) comes from this numpy Generator;
+        # an int seeds a new one. Each iteration it hands every ant a seed for its own stream.
+        self.rng = rng if isinstance(rng, np.random.Generator) else np.random.default_rng(rng)
+        # Build all ants' tours together with NumPy instead of one ant at a time
+        self.vectorized = vectorized
+        # Restrict each step to the k nearest cities (None = consider every city)
+        self.candidate_k = candidate_k
+        # float32 halves the matrix; lazy mode never materializes it and needs candidate lists
+        self.distance_dtype = distance_dtype
+        self.lazy_distances = lazy_distances
+        self.distance_cache_rows = distance_cache_rows
+        if lazy_distances and not candidate_k:
+            raise ValueError("lazy_distances requires candidate_k")
+        if lazy_distances and distances is not None:
+            raise ValueError("lazy_distances needs coordinates, not a distance matrix")
+        # metric(a, b) -> distances between coordinate arrays of shape (..., 2); None = Euclidean
+        self.distance_metric = distance_metric
+        # 'dense' keeps an n x n matrix; 'sparse' tracks only candidate and recently used edges
+        if pheromone_storage not in ('dense', 'sparse'):
+            raise ValueError(f"unknown pheromone_storage {pheromone_storage!r}")
+        if pheromone_storage == 'sparse' and not candidate_k:
+            raise ValueError("sparse pheromone storage requires candidate_k")
+        self.pheromone_storage = pheromone_storage
+        # Worker processes that build the colony's tours (vectorized mode only)
+        self.workers = workers
+        self._parallel = None
+        # Improve tours after construction: None, '2-opt', 'or-opt' or '2-opt+or-opt',
+        # applied to every ant or only the local_search_ants shortest tours
+        if local_search is not None and local_search not in LOCAL_SEARCH_MOVES:
+            raise ValueError(f"unknown local_search {local_search!r}")
+        self.local_search = local_search
+        self.local_search_ants = local_search_ants
+        # Pheromone rule: 'as' (Ant System), 'mmas', 'acs' or a strategy object (see strategies.py)
+        self.strategy = make_strategy(strategy)
+        # 'numba' runs construction, tour lengths and the deposit as compiled kernels (kernels.py);
+        # 'auto' uses them when Numba is installed. Both give the same tours for the same seed.
+        self.backend = kernels.resolve_backend(backend)
+        # Per-phase timings and counters (profiling.py); None while profiling is off
+        self.profiler = Profiler() if profile else None
+        # Default StoppingCriteria for run() (stopping.py)
+        self.stopping = stopping
+        if self.strategy.name != 'as' and pheromone_storage != 'dense':
+            raise ValueError(f"the {self.strategy.name} strategy needs dense pheromone storage")
+        if self.strategy.local_update and workers > 1:
+            raise ValueError("a strategy with local pheromone updates cannot build tours in parallel")
         
-        self.cities = self.generate_cities()
-        self.distances = self.calculate_distances()
-        self.pheromones = np.ones((num_cities, num_cities)) * 0.1
-        
-        self.best_tour = None
-        self.best_distance = float('inf')
-        self.iteration = 0
-        self.last_improvement_iter = 0
+        # An instance given from outside (coordinates and/or a distance matrix) is kept by reset().
+        # With only a distance matrix there are no coordinates and self.cities is None.
+        self.fixed_instance = cities is not None or distances is not None
+        self.explicit_distances = distances is not None
+        if cities is not None:
+            self.cities = np.asarray(cities, dtype=float)
+            self.num_cities = len(self.cities)
+        elif distances is None:
+            self.cities = self.generate_cities()
+        else:
+            self.cities = None
+        if distances is not None:
+            self.distances = np.asarray(distances, dtype=distance_dtype)
+            self.num_cities = len(self.distances)
+        else:
+            self.distances = self.calculate_distances()
+
+        # Cached eta^beta and tau^alpha * eta^beta, tagged with the parameters they were built for
+        self._heuristic = None
+        self._heuristic_params = None
+        self._choice_info = None
+        self._choice_info_params = None
+        self._candidates = None
+        self._candidates_k = None
+        self._ls_neighbours = None
+        # name -> (buffer, view) for matrices that add_city/remove_city resize in place
+        self._buffers = {}
+        if neighbours is not None:
+            # Precomputed (n, k) candidate lists
+            self._candidates = np.asarray(neighbours)
+            self._candidates_k = self.candidate_k = self._candidates.shape[1]
+
+        # pheromones: a starting matrix (or SparsePheromones store), e.g. from a checkpoint
+        self.reset_search(pheromones)
 
     def generate_cities(self):
         # Generate random cities within the bounds, leaving some padding
@@ -39,44 +133,95 @@ class ACO:
                     possible_points.append((x, y))
             
             if len(possible_points) >= self.num_cities:
-                indices = random.sample(range(len(possible_points)), self.num_cities)
+                indices = self.rng.choice(len(possible_points), self.num_cities, replace=False)
                 cities = [possible_points[i] for i in indices]
             else:
                 # Fallback if grid is too small
                 cities = possible_points
                 # Fill rest randomly
                 for _ in range(self.num_cities - len(cities)):
-                    x = random.randint(padding, self.width - padding)
-                    y = random.randint(padding, self.height - padding)
+                    x = int(self.rng.integers(padding, self.width - padding + 1))
+                    y = int(self.rng.integers(padding, self.height - padding + 1))
                     cities.append((x, y))
         else:
             for _ in range(self.num_cities):
-                x = random.randint(padding, self.width - padding)
-                y = random.randint(padding, self.height - padding)
+                x = int(self.rng.integers(padding, self.width - padding + 1))
+                y = int(self.rng.integers(padding, self.height - padding + 1))
                 cities.append((x, y))
                 
         return np.array(cities)
 
     def calculate_distances(self):
-        distances = np.zeros((self.num_cities, self.num_cities))
-        for i in range(self.num_cities):
-            for j in range(self.num_cities):
-                if i != j:
-                    dist = np.linalg.norm(self.cities[i] - self.cities[j])
-                    distances[i][j] = dist
-        return distances
+        if self.lazy_distances:
+            return LazyDistances(self.cities, self.distance_dtype, self.distance_cache_rows, self.distance_metric)
+        return pairwise_distances(self.cities, self.distance_dtype, metric=self.distance_metric)
+
+    def run(self, stopping=None, after_iteration=None):
+        # Iterate until a stopping criterion fires (stopping, or self.stopping) and return its
+        # reason, also kept in stop_reason. after_iteration(aco) is called after every iteration.
+        stopping = stopping or self.stopping
+        if stopping is None:
+            raise ValueError("run() needs stopping criteria")
+        stopping.start()
+        while True:
+            self.stop_reason = stopping.check(self)
+            if self.stop_reason is not None:
+                return self.stop_reason
+            self.run_iteration()
+            if after_iteration is not None:
+                after_iteration(self)
 
     def run_iteration(self):
+        run = self.run_vectorized_iteration if self.vectorized else self.run_serial_iteration
+        profiler = self.profiler
+        if profiler is None:
+            return run()
+
+        start = time.perf_counter()
+        all_tours, all_distances = run()
+        profiler.add('iteration', time.perf_counter() - start)
+        profiler.count('iterations')
+        # Each step weighs every city, or the k candidates of the current one; derived from the
+        # matrix width rather than counted in the construction loops
+        ant_steps = len(all_tours) * (self.num_cities - 1)
+        profiler.count('ant_steps', ant_steps)
+        profiler.count('candidate_slots', ant_steps * self.choice_info_matrix().shape[1])
+        return all_tours, all_distances
+
+    def enable_profiling(self):
+        if self.profiler is None:
+            self.profiler = Profiler()
+        return self.profiler
+
+    def disable_profiling(self):
+        self.profiler = None
+
+    def profile_snapshot(self):
+        # Timings and counters recorded so far (see profiling.py), or None if profiling is off
+        return self.profiler.snapshot() if self.profiler is not None else None
+
+    def run_serial_iteration(self):
         all_tours = []
         all_distances = []
+        profiler = self.profiler
 
         # Move ants
-        for _ in range(self.num_ants):
-            tour = self.construct_solution()
-            dist = self.calculate_tour_distance(tour)
+        start = time.perf_counter()
+        for seed in self.ant_seeds():
+            tour = self.construct_solution(seed)
             all_tours.append(tour)
-            all_distances.append(dist)
-            
+            if profiler is not None:
+                evaluation_start = time.perf_counter()
+            all_distances.append(self.calculate_tour_distance(tour))
+            if profiler is not None:
+                profiler.add('evaluation', time.perf_counter() - evaluation_start)
+        elapsed = time.perf_counter() - start
+        self.construction_time += elapsed
+        if profiler is not None:
+            profiler.add('construction', elapsed)
+        self.improve_tours(all_tours, all_distances)
+
+        for tour, dist in zip(all_tours, all_distances):
             if dist < self.best_distance:
                 self.best_distance = dist
                 self.best_tour = tour
@@ -88,46 +233,255 @@ class ACO:
         
         return all_tours, all_distances
 
-    def construct_solution(self):
-        start_city = random.randint(0, self.num_cities - 1)
+    def run_vectorized_iteration(self):
+        profiler = self.profiler
+        start = time.perf_counter()
+        if self.workers > 1:
+            tours, distances = self.parallel_construction().construct(self)
+        else:
+            tours = self.construct_solutions()
+            if profiler is not None:
+                evaluation_start = time.perf_counter()
+            distances = self.calculate_tour_distances(tours)
+            if profiler is not None:
+                profiler.add('evaluation', time.perf_counter() - evaluation_start)
+        elapsed = time.perf_counter() - start
+        self.construction_time += elapsed
+        if profiler is not None:
+            profiler.add('construction', elapsed)
+        self.improve_tours(tours, distances)
+
+        # First shortest tour wins, same as the per-ant loop
+        best = int(np.argmin(distances))
+        if distances[best] < self.best_distance:
+            self.best_distance = int(distances[best])
+            self.best_tour = tours[best].tolist()
+            self.last_improvement_iter = self.iteration
+
+        all_tours = tours.tolist()
+        all_distances = distances.tolist()
+        self.update_pheromones(all_tours, all_distances)
+        self.iteration += 1
+
+        return all_tours, all_distances
+
+    def improve_tours(self, tours, distances):
+        # Local search on the ants' tours in place (lists or arrays), shortest local_search_ants only
+        # if set. Time spent and length saved accumulate in local_search_time / local_search_gain.
+        if not self.local_search:
+            return
+        from local_search import improve_tour
+        start = time.perf_counter()
+        moves = LOCAL_SEARCH_MOVES[self.local_search]
+        neighbours = self.local_search_neighbours()
+        ants = range(len(tours))
+        if self.local_search_ants is not None:
+            ants = np.argsort(distances, kind='stable')[:self.local_search_ants].tolist()
+        for ant in ants:
+            tour, gain = improve_tour(tours[ant], self.distances, neighbours, moves)
+            tours[ant] = tour
+            distances[ant] -= gain
+            self.local_search_gain += gain
+        elapsed = time.perf_counter() - start
+        self.local_search_time += elapsed
+        if self.profiler is not None:
+            self.profiler.add('local_search', elapsed)
+
+    def local_search_neighbours(self):
+        # The candidate lists if there are any, else a fixed-size list built once per city set
+        candidates = self.candidate_lists()
+        if candidates is not None:
+            return candidates
+        if self._ls_neighbours is None:
+            self._ls_neighbours = self.neighbour_lists(min(LOCAL_SEARCH_NEIGHBOURS, self.num_cities - 1))
+        return self._ls_neighbours
+
+    def construct_solutions(self):
+        # (num_ants, n) array, row a is ant a's tour
+        starts, uniforms, exploit = ant_draws(self.ant_seeds(), self.num_cities, self.strategy.q0)
+        if self.compiled_construction():
+            return kernels.construct_tours(self.choice_info_matrix(), self.candidate_lists(), self.distances,
+                                           starts, uniforms, self.profiler)
+        after_step = self.after_step if self.strategy.local_update else None
+        return construct_tours(self.choice_info_matrix(), self.candidate_lists(), self.distances,
+                               starts, uniforms, self.strategy.q0, exploit, after_step, self.profiler)
+
+    def ant_seeds(self):
+        # One seed per ant for this iteration's random streams, see ant_draws()
+        return self.rng.integers(0, np.iinfo(np.int64).max, size=self.num_ants)
+
+    def compiled_construction(self):
+        # The kernels cover plain roulette construction over a materialized distance matrix
+        return (self.backend == 'numba' and not self.lazy_distances
+                and not self.strategy.q0 and not self.strategy.local_update)
+
+    def after_step(self, from_cities, to_cities):
+        self.strategy.after_step(self, from_cities, to_cities)
+
+    def parallel_construction(self):
+        # Worker pool shared by every iteration; released by close()
+        if self._parallel is not None and not self._parallel.matches(self):
+            self.close()
+        if self._parallel is None:
+            from parallel import ParallelConstruction
+            self._parallel = ParallelConstruction(self, self.workers)
+        return self._parallel
+
+    def close(self):
+        if self._parallel is not None:
+            self._parallel.close()
+            self._parallel = None
+
+    def candidate_lists(self):
+        # (n, k) indices of each city's k nearest neighbours, nearest first; built once per city set.
+        # None once k covers every other city, except that sparse pheromones and lazy distances
+        # always need the lists: k is then clamped to n - 1.
+        if not self.candidate_k:
+            return None
+        k = min(self.candidate_k, self.num_cities - 1)
+        if k == self.num_cities - 1 and self.pheromone_storage == 'dense' and not self.lazy_distances:
+            return None
+        if self._candidates is None or self._candidates_k != k:
+            self._candidates = self.neighbour_lists(k)
+            self._candidates_k = k
+        return self._candidates
+
+    def neighbour_lists(self, k):
+        if self.explicit_distances:
+            return matrix_neighbours(self.distances, k)
+        return nearest_neighbours(self.cities, k, self.distance_metric)
+
+    def heuristic_matrix(self):
+        # eta^beta with eta = 1 / distance over the edges ants can take: the full matrix (zero diagonal),
+        # or (n, k) aligned with candidate_lists(). Rebuilt only when beta, k or the cities change.
+        params = (self.beta, self.candidate_k)
+        if self._heuristic is None or self._heuristic_params != params:
+            candidates = self.candidate_lists()
+            if candidates is not None:
+                distances = self.distances[np.arange(self.num_cities)[:, None], candidates]
+            else:
+                distances = self.distances
+            with np.errstate(divide='ignore'):
+                eta = np.where(distances > 0, 1.0 / distances, 0.0)
+            self._heuristic = eta ** self.beta
+            self._heuristic_params = params
+        return self._heuristic
+
+    def choice_info_matrix(self):
+        # Same layout as heuristic_matrix(). Refreshed after every pheromone update,
+        # or here if alpha/beta/k changed in between
+        if self._choice_info is None or self._choice_info_params != (self.alpha, self.beta, self.candidate_k):
+            self.refresh_choice_info()
+        return self._choice_info
+
+    def refresh_choice_info(self):
+        candidates = self.candidate_lists()
+        if self.pheromone_storage == 'sparse':
+            pheromones = self.pheromones.candidate_values()
+        elif candidates is not None:
+            pheromones = np.take_along_axis(self.pheromones, candidates, axis=1)
+        else:
+            pheromones = self.pheromones
+        self._choice_info = pheromones ** self.alpha * self.heuristic_matrix()
+        self._choice_info_params = (self.alpha, self.beta, self.candidate_k)
+
+    def refresh_choice_info_edges(self, rows, cols):
+        # Recompute the cached choice info of the directed edges (rows[i], cols[i]) in place,
+        # after their (dense) pheromones changed during construction
+        if self._choice_info is None:
+            return
+        heuristic = self.heuristic_matrix()
+        candidates = self.candidate_lists()
+        if candidates is None:
+            self._choice_info[rows, cols] = self.pheromones[rows, cols] ** self.alpha * heuristic[rows, cols]
+            return
+        # Only edges to a candidate have a slot
+        hit, slots = np.nonzero(candidates[rows] == cols[:, None])
+        rows, cols = rows[hit], cols[hit]
+        self._choice_info[rows, slots] = self.pheromones[rows, cols] ** self.alpha * heuristic[rows, slots]
+
+    def clear_caches(self):
+        # Call after replacing cities, distances or pheromones from outside
+        self.close()
+        self._heuristic = None
+        self._heuristic_params = None
+        self._choice_info = None
+        self._choice_info_params = None
+        self._candidates = None
+        self._candidates_k = None
+        self._ls_neighbours = None
+
+    def construct_solution(self, seed=None):
+        # One ant's tour from the stream for seed (a fresh seed from self.rng if None); the same seed
+        # gives the same tour as the vectorized constructor
+        if seed is None:
+            seed = self.ant_seeds()[0]
+        starts, uniforms, exploit = ant_draws([seed], self.num_cities, self.strategy.q0)
+        start_city = int(starts[0])
         tour = [start_city]
         visited = {start_city}
 
         current_city = start_city
+        profiler = self.profiler
         while len(tour) < self.num_cities:
+            step = len(tour) - 1
+            if profiler is not None:
+                started = time.perf_counter()
             probabilities = self.calculate_probabilities(current_city, visited)
-            next_city = self.select_next_city(probabilities)
+            if profiler is not None:
+                sampling_start = time.perf_counter()
+                profiler.add('probabilities', sampling_start - started)
+            next_city = self.select_next_city(probabilities, uniforms[0, step],
+                                              exploit[0, step] if exploit is not None else None)
+            if profiler is not None:
+                profiler.add('sampling', time.perf_counter() - sampling_start)
+            if self.strategy.local_update:
+                self.after_step(np.array([current_city]), np.array([next_city]))
             tour.append(next_city)
             visited.add(next_city)
             current_city = next_city
-        
+
+        if self.strategy.local_update:
+            self.after_step(np.array([current_city]), np.array([start_city]))
         return tour
 
     def calculate_probabilities(self, current_city, visited):
-        pheromones = self.pheromones[current_city]
-        distances = self.distances[current_city]
-        
-        probabilities = []
-        available_cities = []
-
-        for city in range(self.num_cities):
-            if city not in visited:
-                tau = pheromones[city] ** self.alpha
-                eta = (1.0 / distances[city]) ** self.beta if distances[city] > 0 else 0
-                probabilities.append(tau * eta)
-                available_cities.append(city)
-        
-        total = sum(probabilities)
-        if total == 0:
+        weights = self.choice_info_matrix()[current_city]
+        candidates = self.candidate_lists()
+        if candidates is not None:
+            slots = [slot for slot, city in enumerate(candidates[current_city]) if city not in visited]
+            available_cities = [int(candidates[current_city][slot]) for slot in slots]
+            probabilities = weights[slots]
+        else:
+            available_cities = [city for city in range(self.num_cities) if city not in visited]
+            probabilities = weights[available_cities]
+
+        # Weights are left unnormalized so the roulette does the same arithmetic as construct_tours
+        if not probabilities.any():
+            if candidates is not None:
+                # Every candidate is used: go to the nearest unvisited city
+                unvisited = [city for city in range(self.num_cities) if city not in visited]
+                nearest = min(unvisited, key=lambda city: self.distances[current_city][city])
+                if self.profiler is not None:
+                    self.profiler.count('nearest_fallbacks')
+                return np.ones(1), [nearest]
             # Should not happen if initialized correctly, but fallback to uniform
-            return [1.0 / len(available_cities)] * len(available_cities), available_cities
-        
-        return [p / total for p in probabilities], available_cities
+            if self.profiler is not None:
+                self.profiler.count('uniform_fallbacks')
+            return np.ones(len(available_cities)), available_cities
+
+        return probabilities, available_cities
 
-    def select_next_city(self, prob_data):
+    def select_next_city(self, prob_data, uniform=None, exploit=None):
+        # Roulette over the weights with the uniform number uniform (drawn from self.rng if None)
         probabilities, available_cities = prob_data
-        # Use random.choices for weighted selection
-        return random.choices(available_cities, weights=probabilities, k=1)[0]
+        if uniform is None:
+            uniform, exploit = self.rng.random(2)
+        if self.strategy.q0 and exploit < self.strategy.q0:
+            # Pseudo-random proportional rule: take the most attractive city
+            return available_cities[int(np.argmax(probabilities))]
+        cumulative = np.cumsum(probabilities)[None, :]
+        return available_cities[int(roulette_select(cumulative, uniform * cumulative[:, -1])[0])]
 
     def calculate_tour_distance(self, tour):
         # Sum integer-rounded edge distances to match UI display
@@ -139,36 +493,638 @@ class ACO:
             distance += edge_dist
         return distance
 
+    def calculate_tour_distances(self, tours):
+        # Same integer-rounded edge sum as calculate_tour_distance, for a 2D array of tours
+        if self.backend == 'numba' and isinstance(self.distances, np.ndarray):
+            return kernels.tour_lengths(self.distances, tours)
+        return tour_lengths(self.distances, tours)
+
     def update_pheromones(self, tours, distances):
-        # Evaporation
-        self.pheromones *= (1 - self.evaporation_rate)
-        
-        # Deposit
-        for tour, dist in zip(tours, distances):
-            deposit = self.q / dist
-            for i in range(len(tour)):
-                from_city = tour[i]
-                to_city = tour[(i + 1) % len(tour)]
-                self.pheromones[from_city][to_city] += deposit
-                self.pheromones[to_city][from_city] += deposit # Symmetric TSP
+        if self.profiler is not None:
+            start = time.perf_counter()
+        self.strategy.update_pheromones(self, tours, distances)
+        self.refresh_choice_info()
+        if self.profiler is not None:
+            self.profiler.add('pheromone_update', time.perf_counter() - start)
+
+    def evaporate_pheromones(self, rate):
+        if self.pheromone_storage == 'sparse':
+            self.pheromones.evaporate(rate)
+        else:
+            self.pheromones *= (1 - rate)
+
+    def deposit_pheromones(self, tours, distances):
+        # Every tour deposits q / its length on each of its edges
+        if self.backend == 'numba' and self.pheromone_storage == 'dense':
+            kernels.deposit(self.pheromones, np.array(tours, dtype=np.int32, ndmin=2),
+                            self.q / np.asarray(distances, dtype=float))
+            return
+        from_cities, to_cities, deposits = self.tour_edges(tours, distances)
+        if self.pheromone_storage == 'sparse':
+            self.pheromones.deposit(from_cities, to_cities, deposits, self.iteration)
+            return
+
+        # Deposit on both directions of every edge (symmetric TSP). Entries are interleaved
+        # as [a][b], [b][a] per edge in tour order, the same order as adding them one at a time,
+        # so np.add.at gives exactly the same sums.
+        rows = np.stack([from_cities, to_cities], axis=1).ravel()
+        cols = np.stack([to_cities, from_cities], axis=1).ravel()
+        np.add.at(self.pheromones, (rows, cols), np.repeat(deposits, 2))
+
+    def tour_edges(self, tours, distances):
+        # Flattened (from, to, q / tour_distance) for every edge of every tour, including the return edge
+        tours = np.array(tours, dtype=np.int64, ndmin=2)
+        deposits = self.q / np.asarray(distances, dtype=float)
+        return tours.ravel(), np.roll(tours, -1, axis=1).ravel(), np.repeat(deposits, tours.shape[1])
 
     def reset(self):
-        self.cities = self.generate_cities()
-        self.distances = self.calculate_distances()
-        self.pheromones = np.ones((self.num_cities, self.num_cities)) * 0.1
+        if not self.fixed_instance:
+            self.cities = self.generate_cities()
+            self.distances = self.calculate_distances()
+        self.clear_caches()
+        self.reset_search()
+
+    def reset_search(self, pheromones=None):
+        # Fresh uniform trails (or the given ones) and no best tour; cities and distances are kept
+        if pheromones is not None:
+            self.pheromones = pheromones
+        elif self.pheromone_storage == 'sparse':
+            self.pheromones = SparsePheromones(self.candidate_lists(), self.strategy.initial_pheromone(self))
+        else:
+            self.pheromones = np.full((self.num_cities, self.num_cities), self.strategy.initial_pheromone(self))
+        self._choice_info = None
         self.best_tour = None
         self.best_distance = float('inf')
         self.iteration = 0
         self.last_improvement_iter = 0
+        # Why the last run() returned
+        self.stop_reason = None
+        # Seconds spent building tours and in local search, and the total length local search removed
+        self.construction_time = 0.0
+        self.local_search_time = 0.0
+        self.local_search_gain = 0
 
-    def run_best_path_demo(self):
-        # Returns tours that are all the best tour
-        if self.best_tour is None:
-            return [], []
-        
-        all_tours = [self.best_tour[:] for _ in range(self.num_ants)]
-        all_distances = [self.best_distance for _ in range(self.num_ants)]
-        
-        # Do not update pheromones or iteration count
-        
-        return all_tours, all_distances
+    def warm_start(self, tour=None, pheromones=None, cities=None, weight=None):
+        # Restart the search from an earlier run's results instead of uniform trails. tour and
+        # pheromones (a matrix or SparsePheromones store) are indexed by that run's cities, whose
+        # coordinates are given as cities: cities at the same coordinates here are matched, so
+        # cities may have been added, removed or reordered (None = the same cities in the same order).
+        # Trails between matched cities are copied and every other edge starts at the initial level.
+        # The tour, without removed cities and with new ones added by cheapest insertion, becomes
+        # the best tour and deposits weight ants' worth of pheromone on its edges (default num_ants).
+        self.reset_search()
+        if cities is None:
+            old_index = np.arange(self.num_cities)
+        elif self.cities is None:
+            raise ValueError("matching cities by coordinates needs an instance with coordinates")
+        else:
+            old_index = match_cities(cities, self.cities)
+
+        if pheromones is not None:
+            if self.pheromone_storage == 'sparse':
+                candidates = self.candidate_lists()
+                rows = np.repeat(np.arange(self.num_cities), candidates.shape[1])
+                cols = candidates.ravel()
+                matched = (old_index[rows] >= 0) & (old_index[cols] >= 0)
+                self.pheromones.values[matched] = trail_values(pheromones, old_index[rows[matched]],
+                                                               old_index[cols[matched]])
+            else:
+                matched = np.flatnonzero(old_index >= 0)
+                rows, cols = np.ix_(matched, matched)
+                self.pheromones[rows, cols] = trail_values(pheromones, old_index[rows], old_index[cols])
+
+        if tour is not None and len(tour):
+            tour = np.asarray(tour, dtype=np.int64)
+            new_index = np.full(max(old_index.max(initial=-1), tour.max()) + 1, -1)
+            new_index[old_index[old_index >= 0]] = np.flatnonzero(old_index >= 0)
+            kept = new_index[tour]
+            kept = kept[kept >= 0]
+            missing = np.setdiff1d(np.arange(self.num_cities), kept)
+            self.best_tour = cheapest_insertion(kept.tolist(), missing, self.distances)
+            self.best_distance = self.calculate_tour_distance(self.best_tour)
+            weight = self.num_ants if weight is None else weight
+            if weight and self.best_distance > 0:
+                self.deposit_pheromones([self.best_tour], [self.best_distance / weight])
+        self._choice_info = None
+
+    def add_city(self, point=None, distances=None):
+        # Add a city to the running search and return its index (always the last one). point is its
+        # coordinates; an instance without coordinates passes distances, its distance to every city.
+        # The new city's edges start at the level of an edge no ant has used and it is put into the
+        # best tour by cheapest insertion, so the search continues from where it was.
+        n = self.num_cities
+        if self.cities is not None:
+            if point is None:
+                raise ValueError("add_city needs the new city's coordinates")
+            point = np.asarray(point, dtype=float)
+            if distances is None:
+                distances = (self.distance_metric or euclidean)(np.asarray(self.cities, dtype=float), point)
+            self.cities = np.vstack([self.cities, point[None, :]])
+        elif distances is None:
+            raise ValueError("add_city needs the new city's distances when the instance has no coordinates")
+        row = np.asarray(distances, dtype=self.distance_dtype)
+
+        if self.lazy_distances:
+            self.distances = LazyDistances(self.cities, self.distance_dtype, self.distance_cache_rows,
+                                           self.distance_metric)
+        else:
+            matrix = self._resized('distances', n + 1)
+            matrix[n, :n] = row
+            matrix[:n, n] = row
+            matrix[n, n] = 0
+
+        if self.pheromone_storage == 'sparse':
+            self.num_cities = n + 1
+            self.clear_caches()
+            self._rebuild_sparse(np.append(np.arange(n), -1))
+        else:
+            # The diagonal only ever evaporates (or is clipped), so it holds the level of an unused edge
+            level = self.pheromones[0, 0]
+            matrix = self._resized('pheromones', n + 1)
+            matrix[n, :] = level
+            matrix[:, n] = level
+            self.num_cities = n + 1
+            self.clear_caches()
+
+        if self.best_tour is not None:
+            self.best_tour = cheapest_insertion(self.best_tour, [n], self.distances)
+            self.best_distance = int(self.calculate_tour_distances(np.array([self.best_tour]))[0])
+            self.last_improvement_iter = self.iteration
+        return n
+
+    def remove_city(self, index):
+        # Remove city index from the running search. The last city moves into its slot, so only
+        # O(n) entries of each matrix move; the best tour skips the removed city.
+        n = self.num_cities
+        if not 0 <= index < n:
+            raise IndexError(f"city {index} out of range for {n} cities")
+        last = n - 1
+        old_index = np.arange(last)
+        if index != last:
+            old_index[index] = last
+        if self.cities is not None:
+            self.cities = self.cities[old_index]
+
+        if self.lazy_distances:
+            self.distances = LazyDistances(self.cities, self.distance_dtype, self.distance_cache_rows,
+                                           self.distance_metric)
+        else:
+            matrix = self._resized('distances', n)
+            matrix[index, :] = matrix[last, :]
+            matrix[:, index] = matrix[:, last]
+            self._resized('distances', last)
+
+        if self.pheromone_storage == 'sparse':
+            self.num_cities = last
+            self.clear_caches()
+            self._rebuild_sparse(old_index)
+        else:
+            matrix = self._resized('pheromones', n)
+            matrix[index, :] = matrix[last, :]
+            matrix[:, index] = matrix[:, last]
+            self._resized('pheromones', last)
+            self.num_cities = last
+            self.clear_caches()
+
+        if self.best_tour is not None:
+            self.best_tour = [index if city == last else city for city in self.best_tour if city != index]
+            self.best_distance = int(self.calculate_tour_distances(np.array([self.best_tour]))[0])
+            self.last_improvement_iter = self.iteration
+
+    def random_point(self):
+        # Coordinates for one more random city, placed as generate_cities would: a free grid point
+        # in grid mode (anywhere once the grid is full)
+        padding = 50
+        if self.grid_spacing:
+            xs = range(padding, self.width - padding + 1, self.grid_spacing)
+            ys = range(padding, self.height - padding + 1, self.grid_spacing)
+            grid_x, grid_y = np.meshgrid(xs, ys)
+            points = np.column_stack([grid_x.ravel(), grid_y.ravel()])
+            # Mark the grid points cities sit on by their column and row
+            cities = np.asarray(self.cities, dtype=float)
+            cols = (cities[:, 0] - padding) / self.grid_spacing
+            rows = (cities[:, 1] - padding) / self.grid_spacing
+            on_grid = (cols == np.rint(cols)) & (rows == np.rint(rows)) & \
+                      (cols >= 0) & (cols < len(xs)) & (rows >= 0) & (rows < len(ys))
+            taken = np.zeros(grid_x.shape, dtype=bool)
+            taken[rows[on_grid].astype(int), cols[on_grid].astype(int)] = True
+            free = points[~taken.ravel()]
+            if len(free):
+                return free[int(self.rng.integers(len(free)))]
+        return np.array([int(self.rng.integers(padding, self.width - padding + 1)),
+                         int(self.rng.integers(padding, self.height - padding + 1))])
+
+    def _resized(self, name, n):
+        # self.<name>, a dense matrix, as the top-left n x n block of a larger buffer, so adding or
+        # removing a city writes one row and column instead of copying the matrix. The buffer is
+        # reallocated with room to spare when it is too small or the matrix is not its view yet.
+        matrix = getattr(self, name)
+        buffer, view = self._buffers.get(name, (None, None))
+        if view is not matrix or len(buffer) < n:
+            size = min(len(matrix), n)
+            buffer = np.empty((n + max(n // 4, 16),) * 2, dtype=matrix.dtype)
+            buffer[:size, :size] = matrix[:size, :size]
+        view = buffer[:n, :n]
+        self._buffers[name] = (buffer, view)
+        setattr(self, name, view)
+        return view
+
+    def _rebuild_sparse(self, old_index):
+        # New SparsePheromones store over the current candidate lists, carrying over the trails
+        # of the old store; old_index gives each city's index in the old store (-1 = new city)
+        old = self.pheromones
+        candidates = self.candidate_lists()
+        store = SparsePheromones(candidates, old.initial, old.history)
+        store.log_decay = old.log_decay
+        store._last_prune = old._last_prune
+
+        rows = np.repeat(np.arange(self.num_cities), candidates.shape[1])
+        cols = candidates.ravel()
+        matched = (old_index[rows] >= 0) & (old_index[cols] >= 0)
+        store.values[matched] = old.values_at(old_index[rows[matched]], old_index[cols[matched]])
+        store.stamps[matched] = store.log_decay
+
+        new_index = np.full(old.num_cities, -1)
+        new_index[old_index[old_index >= 0]] = np.flatnonzero(old_index >= 0)
+        for (i, j), entry in old.extra.items():
+            # Edges that became candidates were carried over by values_at above
+            a, b = int(new_index[i]), int(new_index[j])
+            if a >= 0 and b >= 0 and (store._slots([a, b], [b, a]) < 0).all():
+                store.extra[(min(a, b), max(a, b))] = list(entry)
+        self.pheromones = store
+
+
+def ant_draws(seeds, n, q0=0.0):
+    # Random numbers for one iteration, from a separate Generator per ant: its start city, one
+    # roulette uniform per step and, when q0 > 0, one exploitation uniform per step. Any process
+    # given the same seeds builds the same tours.
+    starts = np.empty(len(seeds), dtype=np.int64)
+    uniforms = np.empty((len(seeds), n - 1))
+    exploit = np.empty((len(seeds), n - 1)) if q0 else None
+    for ant, seed in enumerate(seeds):
+        stream = np.random.default_rng(int(seed))
+        starts[ant] = stream.integers(n)
+        uniforms[ant] = stream.random(n - 1)
+        if q0:
+            exploit[ant] = stream.random(n - 1)
+    return starts, uniforms, exploit
+
+
+def construct_tours(choice_info, candidates, distances, starts, uniforms, q0=0.0, exploit=None, after_step=None,
+                    profiler=None):
+    # Build one tour per start city together, one step per column, with the random numbers from
+    # ant_draws(). choice_info is (n, n), or (n, k) aligned with candidates when candidate lists are used;
+    # distances is only read for the nearest-city fallback. With q0 > 0 each step takes the most
+    # attractive city when exploit < q0 (ACS); after_step(from, to) is called after every step,
+    # including the closing one, and may update choice_info in place. Fallbacks are counted in profiler.
+    n = len(choice_info)
+    num_ants = len(starts)
+    ants = np.arange(num_ants)
+    tours = np.empty((num_ants, n), dtype=np.int64)
+    visited = np.zeros((num_ants, n), dtype=bool)
+
+    current = starts
+    tours[:, 0] = current
+    visited[ants, current] = True
+
+    for step in range(1, n):
+        greedy = exploit[:, step - 1] < q0 if q0 else None
+        if candidates is not None:
+            current = candidate_step(current, visited, candidates, choice_info, distances,
+                                     uniforms[:, step - 1], greedy, profiler)
+        else:
+            weights = np.where(visited, 0.0, choice_info[current])
+            cumulative = np.cumsum(weights, axis=1)
+            totals = cumulative[:, -1]
+
+            stuck = totals == 0
+            if stuck.any():
+                # Fallback to uniform over the unvisited cities
+                if profiler is not None:
+                    profiler.count('uniform_fallbacks', int(stuck.sum()))
+                cumulative[stuck] = np.cumsum(~visited[stuck], axis=1)
+                totals = cumulative[:, -1]
+
+            picks = roulette_select(cumulative, uniforms[:, step - 1] * totals)
+            if greedy is not None:
+                greedy &= ~stuck
+                picks[greedy] = np.argmax(weights[greedy], axis=1)
+            current = picks
+        if after_step is not None:
+            after_step(tours[:, step - 1], current)
+        tours[:, step] = current
+        visited[ants, current] = True
+
+    if after_step is not None:
+        after_step(tours[:, -1], tours[:, 0])
+    return tours
+
+
+def candidate_step(current, visited, candidates, candidate_choice, distances, uniforms, greedy=None, profiler=None):
+    # Roulette over each ant's unvisited candidates; ants with none left go to the nearest unvisited city.
+    # Ants flagged in greedy take their best candidate instead.
+    options = candidates[current]
+    weights = np.where(np.take_along_axis(visited, options, axis=1), 0.0, candidate_choice[current])
+    cumulative = np.cumsum(weights, axis=1)
+    totals = cumulative[:, -1]
+
+    picks = roulette_select(cumulative, uniforms * totals)
+    exhausted = totals == 0
+    if greedy is not None:
+        greedy = greedy & ~exhausted
+        picks[greedy] = np.argmax(weights[greedy], axis=1)
+    picks[exhausted] = 0
+    next_cities = np.take_along_axis(options, picks[:, None], axis=1)[:, 0]
+
+    if exhausted.any():
+        if profiler is not None:
+            profiler.count('nearest_fallbacks', int(exhausted.sum()))
+        next_cities[exhausted] = nearest_unvisited(distances, current[exhausted], visited[exhausted])
+    return next_cities
+
+
+def nearest_unvisited(distances, cities, visited):
+    # cities: (a,) current positions, visited: (a, n) masks
+    return np.argmin(np.where(visited, np.inf, distances[cities]), axis=1)
+
+
+def nearest_neighbour_tour(distances, start=0):
+    # Greedy tour: always go to the nearest unvisited city
+    n = len(distances)
+    visited = np.zeros(n, dtype=bool)
+    tour = [start]
+    visited[start] = True
+    for _ in range(n - 1):
+        city = int(np.argmin(np.where(visited, np.inf, distances[tour[-1]])))
+        tour.append(city)
+        visited[city] = True
+    return tour
+
+
+def cheapest_insertion(tour, cities, distances):
+    # tour (a list) with each of cities inserted, in turn, where it lengthens the tour least
+    tour = list(tour)
+    for city in cities:
+        city = int(city)
+        if len(tour) < 2:
+            tour.append(city)
+            continue
+        here = np.asarray(tour)
+        following = np.roll(here, -1)
+        added = distances[here, city] + distances[city, following] - distances[here, following]
+        tour.insert(int(np.argmin(added)) + 1, city)
+    return tour
+
+
+def match_cities(old, new):
+    # Index of the city in old at the same coordinates as each city in new, -1 if there is none.
+    # Each old city is matched at most once, so duplicated coordinates pair up in order.
+    unused = {}
+    for index, point in enumerate(np.asarray(old, dtype=float).tolist()):
+        unused.setdefault(tuple(point), []).append(index)
+    matches = np.full(len(new), -1, dtype=np.int64)
+    for index, point in enumerate(np.asarray(new, dtype=float).tolist()):
+        same = unused.get(tuple(point))
+        if same:
+            matches[index] = same.pop(0)
+    return matches
+
+
+def trail_values(pheromones, rows, cols):
+    # Pheromone on the edges (rows, cols) of a dense matrix or SparsePheromones store
+    rows, cols = np.broadcast_arrays(rows, cols)
+    if isinstance(pheromones, SparsePheromones):
+        return pheromones.values_at(rows, cols)
+    return np.asarray(pheromones)[rows, cols]
+
+
+def tour_lengths(distances, tours):
+    # Integer-rounded edge sums of a 2D array of closed tours
+    edges = distances[tours, np.roll(tours, -1, axis=1)]
+    return edges.astype(np.int64).sum(axis=1)
+
+
+def roulette_select(cumulative, thresholds):
+    # Row-wise searchsorted(side='right'): first column whose running total exceeds the threshold.
+    # Thresholds are kept strictly below each row's total so only positive-weight columns can win.
+    thresholds = np.minimum(thresholds, np.nextafter(cumulative[:, -1], 0))
+    return (cumulative <= thresholds[:, None]).sum(axis=1)
+
+
+def euclidean(a, b):
+    return np.sqrt(((a - b) ** 2).sum(axis=-1))
+
+
+def nearest_neighbours(points, k, metric=None, block_size=1024):
+    # (n, k) indices of each point's k nearest other points, nearest first
+    n = len(points)
+    k = min(k, n - 1)
+    points = np.asarray(points, dtype=float)
+
+    if cKDTree is not None and metric is None:
+        _, found = cKDTree(points).query(points, k=k + 1)
+        # Drop each point itself; with duplicate coordinates it may not be in column 0
+        not_self = found != np.arange(n)[:, None]
+        not_self[not_self.sum(axis=1) > k, -1] = False
+        return found[not_self].reshape(n, k)
+
+    metric = metric or euclidean
+    return _blocked_neighbours(n, k, lambda rows: metric(points[rows, None, :], points[None, :, :]), block_size)
+
+
+def matrix_neighbours(distances, k, block_size=1024):
+    # Same as nearest_neighbours, read from a distance matrix
+    n = len(distances)
+    return _blocked_neighbours(n, min(k, n - 1), lambda rows: np.array(distances[rows], dtype=float), block_size)
+
+
+def _blocked_neighbours(n, k, block_distances, block_size):
+    # Brute force over block_size rows at a time keeps memory at block_size x n
+    neighbours = np.empty((n, k), dtype=np.int64)
+    for start in range(0, n, block_size):
+        rows = np.arange(start, min(start + block_size, n))
+        dist = block_distances(rows)
+        dist[np.arange(len(rows)), rows] = np.inf
+        nearest = np.argpartition(dist, k - 1, axis=1)[:, :k]
+        order = np.argsort(np.take_along_axis(dist, nearest, axis=1), axis=1)
+        neighbours[rows] = np.take_along_axis(nearest, order, axis=1)
+    return neighbours
+
+
+def pairwise_distances(points, dtype=np.float64, block_size=1024, metric=None):
+    # Distance matrix (Euclidean unless a metric is given), filled block_size rows at a time
+    # to bound the temporaries
+    metric = metric or euclidean
+    points = np.asarray(points, dtype=float)
+    n = len(points)
+    distances = np.empty((n, n), dtype=dtype)
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        distances[start:stop] = metric(points[start:stop, None, :], points[None, :, :])
+    return distances
+
+
+class LazyDistances:
+    # Stand-in for the distance matrix that computes entries from coordinates on demand.
+    # Supports distances[i][j], distances[i], distances[rows] and distances[rows, cols],
+    # keeping at most cache_rows full rows in an LRU cache.
+    def __init__(self, points, dtype=np.float64, cache_rows=1024, metric=None):
+        self.points = np.asarray(points, dtype=float)
+        self.dtype = dtype
+        self.metric = metric or euclidean
+        self.cache_rows = cache_rows
+        self._rows = OrderedDict()
+
+    @property
+    def shape(self):
+        return (len(self.points), len(self.points))
+
+    def __len__(self):
+        return len(self.points)
+
+    def row(self, i):
+        i = int(i)
+        row = self._rows.get(i)
+        if row is None:
+            row = self.metric(self.points, self.points[i]).astype(self.dtype)
+            self._rows[i] = row
+            if len(self._rows) > self.cache_rows:
+                self._rows.popitem(last=False)
+        else:
+            self._rows.move_to_end(i)
+        return row
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            rows, cols = key
+            if np.ndim(rows) == 0:
+                return self.row(rows)[cols]
+            rows, cols = np.broadcast_arrays(rows, cols)
+            return self.metric(self.points[rows], self.points[cols]).astype(self.dtype)
+        if np.ndim(key) == 0:
+            return self.row(key)
+        return self.metric(self.points[np.asarray(key)][:, None, :], self.points[None, :, :]).astype(self.dtype)
+
+
+class SparsePheromones:
+    # Pheromone store for large instances. Only edges in the candidate lists (one slot per
+    # (city, candidate) pair) and edges deposited by recent tours are kept; any other edge
+    # reads as the initial value after evaporation, exactly as in the dense matrix.
+    #
+    # Evaporation is lazy: log_decay accumulates log(1 - rho) and each tracked edge stores the
+    # log_decay it was last brought up to date with, so an iteration costs O(deposited edges).
+    def __init__(self, candidates, initial, history=50):
+        self.candidates = candidates
+        self.initial = initial
+        self.history = history
+        n, k = candidates.shape
+        self.num_cities = n
+        self.values = np.full(n * k, float(initial))
+        self.stamps = np.zeros(n * k)
+        self.log_decay = 0.0
+        # (i, j) with i < j -> [value, stamp, iteration last deposited], for edges outside the lists
+        self.extra = {}
+
+        keys = (np.arange(n)[:, None] * n + candidates).ravel()
+        self._slot_order = np.argsort(keys)
+        self._slot_keys = keys[self._slot_order]
+        self._last_prune = 0
+
+    def _slots(self, rows, cols):
+        # Flat slot index of each directed edge (rows[i] -> cols[i]), -1 where it is not a candidate
+        keys = np.asarray(rows) * self.num_cities + np.asarray(cols)
+        pos = np.minimum(np.searchsorted(self._slot_keys, keys), len(self._slot_keys) - 1)
+        found = self._slot_keys[pos] == keys
+        return np.where(found, self._slot_order[pos], -1)
+
+    def evaporate(self, rate):
+        self.log_decay += np.log1p(-rate)
+
+    def floor(self):
+        # Value of an edge nothing has been deposited on
+        return self.initial * np.exp(self.log_decay)
+
+    def candidate_values(self):
+        # (n, k) current values aligned with the candidate lists
+        return (self.values * np.exp(self.log_decay - self.stamps)).reshape(self.candidates.shape)
+
+    def deposit(self, rows, cols, amounts, iteration):
+        rows = np.asarray(rows)
+        cols = np.asarray(cols)
+        amounts = np.asarray(amounts, dtype=float)
+        forward = self._slots(rows, cols)
+        backward = self._slots(cols, rows)
+
+        slots = np.concatenate([forward[forward >= 0], backward[backward >= 0]])
+        slot_amounts = np.concatenate([amounts[forward >= 0], amounts[backward >= 0]])
+        touched = np.unique(slots)
+        self.values[touched] *= np.exp(self.log_decay - self.stamps[touched])
+        self.stamps[touched] = self.log_decay
+        np.add.at(self.values, slots, slot_amounts)
+
+        outside = (forward < 0) & (backward < 0)
+        if outside.any():
+            lo = np.minimum(rows[outside], cols[outside])
+            hi = np.maximum(rows[outside], cols[outside])
+            keys, inverse = np.unique(lo * self.num_cities + hi, return_inverse=True)
+            totals = np.bincount(inverse, weights=amounts[outside])
+            for key, total in zip(keys.tolist(), totals.tolist()):
+                edge = divmod(key, self.num_cities)
+                entry = self.extra.get(edge)
+                if entry is None:
+                    self.extra[edge] = [self.floor() + total, self.log_decay, iteration]
+                else:
+                    entry[0] = entry[0] * np.exp(self.log_decay - entry[1]) + total
+                    entry[1] = self.log_decay
+                    entry[2] = iteration
+
+        if iteration - self._last_prune >= self.history:
+            self.prune(iteration)
+
+    def prune(self, iteration):
+        # Forget off-list edges no tour has used in the last `history` iterations
+        self.extra = {edge: entry for edge, entry in self.extra.items()
+                      if iteration - entry[2] < self.history}
+        self._last_prune = iteration
+
+    def values_at(self, rows, cols):
+        # Current value of each edge (rows[i], cols[i])
+        rows = np.asarray(rows)
+        cols = np.asarray(cols)
+        slots = self._slots(rows, cols)
+        backward = self._slots(cols, rows)
+        slots = np.where(slots >= 0, slots, backward)
+
+        result = np.full(rows.shape, self.floor())
+        tracked = slots >= 0
+        result[tracked] = self.values[slots[tracked]] * np.exp(self.log_decay - self.stamps[slots[tracked]])
+
+        # Off-list edges: look their keys up among the sorted keys of the extra edges
+        untracked = np.flatnonzero(~tracked.ravel())
+        if len(untracked) and self.extra:
+            edges = np.array(list(self.extra), dtype=np.int64)
+            entries = np.array(list(self.extra.values()), dtype=float)
+            extra_keys = edges[:, 0] * self.num_cities + edges[:, 1]
+            order = np.argsort(extra_keys)
+            extra_keys = extra_keys[order]
+            i, j = rows.ravel()[untracked], cols.ravel()[untracked]
+            keys = np.minimum(i, j) * self.num_cities + np.maximum(i, j)
+            pos = np.minimum(np.searchsorted(extra_keys, keys), len(extra_keys) - 1)
+            found = extra_keys[pos] == keys
+            entry = entries[order[pos[found]]]
+            result.ravel()[untracked[found]] = entry[:, 0] * np.exp(self.log_decay - entry[:, 1])
+        return result
+
+    def to_dense(self):
+        # Full n x n matrix; only sensible for small instances
+        n = self.num_cities
+        rows, cols = np.indices((n, n))
+        dense = self.values_at(rows.ravel(), cols.ravel()).reshape(n, n)
+        np.fill_diagonal(dense, self.floor())
+        return dense
+
+
+if __name__ == "__main__":
+    # python -m aco solve ... (see cli.py)
+    from cli import main
+    main()
@@ -0,0 +1,190 @@
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import Future
+
+import numpy as np
+
+# Runs an ACO on a background thread so the solver iterates at full speed, independent of the
+# visualizer's frame rate and animations.
+# - After an iteration the thread publishes a Snapshot by assigning it to `latest`, at most every
+#   publish_interval seconds. A snapshot is never changed once published, so the render thread reads
+#   `latest` without a lock and always sees one consistent state.
+# - Everything that changes the solver (parameters, cities, resets) must run on the solver thread:
+#   submit(function) queues function(aco) to run between iterations and returns a Future.
+# - The thread idles while paused or once the ACO's stopping criteria have fired. Any submitted
+#   change clears the stop reason, so the criteria are checked again.
+# - An exception from an iteration or the stopping criteria is printed and kept in `error`; the
+#   thread then idles with stop_reason 'error' and keeps answering submit(), e.g. a reset.
+# - Snapshots carry only the strongest pheromone edges (pheromone_edges), not the matrix, so
+#   publishing stays cheap on instances with thousands of cities.
+# Numba kernels release the GIL, so with backend='numba' construction runs alongside rendering.
+
+_CLOSE = object()
+
+
+class Snapshot:
+    # Copy of the solver state the visualizer draws, taken on the solver thread
+    def __init__(self, aco, tours, version, edge_limit):
+        self.version = version
+        self.iteration = aco.iteration
+        self.num_cities = aco.num_cities
+        self.num_ants = aco.num_ants
+        self.cities = np.array(aco.cities) if aco.cities is not None else None
+        self.best_tour = list(aco.best_tour) if aco.best_tour is not None else None
+        self.best_distance = aco.best_distance
+        self.last_improvement_iter = aco.last_improvement_iter
+        self.stop_reason = aco.stop_reason
+        # Length of the best tour's edge from tour[i] to tour[i + 1]
+        self.best_edge_lengths = None
+        if self.best_tour is not None:
+            tour = np.asarray(self.best_tour)
+            self.best_edge_lengths = np.asarray(aco.distances[tour, np.roll(tour, -1)])
+        self.pheromone_edges = pheromone_edges(aco, edge_limit)
+        # The tours of the last iteration, for ant animations
+        self.tours = tours
+        self.profile = aco.profile_snapshot()
+
+
+class BackgroundSolver:
+    def __init__(self, aco, publish_interval=1 / 60, edge_limit=2000):
+        self.aco = aco
+        self.publish_interval = publish_interval
+        # Pheromone edges per snapshot
+        self.edge_limit = edge_limit
+        # Best distance after every iteration; appended by the solver thread only
+        self.history = []
+        # Last exception raised by an iteration, until a submitted change clears it
+        self.error = None
+        self._version = 0
+        self._commands = queue.Queue()
+        self._running = threading.Event()
+        self.latest = None
+        self._publish([])
+        self._thread = threading.Thread(target=self._loop, name='aco-solver', daemon=True)
+        self._thread.start()
+
+    def resume(self):
+        self._running.set()
+        self._commands.put(None)  # wake the thread if it is idle
+
+    def pause(self):
+        # The iteration in progress still finishes and is published
+        self._running.clear()
+
+    @property
+    def running(self):
+        return self._running.is_set()
+
+    def submit(self, function):
+        # Future for function(aco), run on the solver thread before the next iteration
+        future = Future()
+        self._commands.put((function, future))
+        return future
+
+    def close(self):
+        self._running.clear()
+        self._commands.put(_CLOSE)
+        self._thread.join()
+        self.aco.close()
+
+    def _publish(self, tours):
+        self._version += 1
+        self.latest = Snapshot(self.aco, tours, self._version, self.edge_limit)
+
+    def _loop(self):
+        aco = self.aco
+        tours = []
+        published = time.perf_counter()
+        unpublished = False
+        while True:
+            idle = not self._running.is_set() or aco.stop_reason is not None
+            if idle and unpublished:
+                self._publish(tours)
+                unpublished = False
+            try:
+                command = self._commands.get(block=idle)
+            except queue.Empty:
+                command = None
+
+            if command is _CLOSE:
+                return
+            if command is not None:
+                function, future = command
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    result, error = function(aco), None
+                except Exception as exception:
+                    result, error = None, exception
+                aco.stop_reason = None
+                self.error = None
+                # The last tours may refer to cities that no longer exist
+                tours = []
+                # Published before the future completes, so a caller waiting on it sees the new state
+                self._publish(tours)
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+                continue
+            if idle:
+                continue
+
+            try:
+                if aco.stopping is not None:
+                    aco.stop_reason = aco.stopping.check(aco)
+                    if aco.stop_reason is not None:
+                        unpublished = True
+                        continue
+                tours, _ = aco.run_iteration()
+            except Exception as exception:
+                traceback.print_exc()
+                self.error = exception
+                aco.stop_reason = 'error'
+                tours = []
+                unpublished = True
+                continue
+            if aco.best_distance != float('inf'):
+                self.history.append(aco.best_distance)
+            unpublished = True
+            now = time.perf_counter()
+            if now - published >= self.publish_interval:
+                self._publish(tours)
+                published = now
+                unpublished = False
+
+
+def pheromone_edges(aco, limit, threshold=0.05):
+    # (rows, cols, strengths) of the edges worth drawing, strongest first: trails above threshold
+    # times the strongest (strength 1), at most `limit` of them. With candidate lists only the
+    # candidate edges are considered, which costs O(nk) instead of O(n^2).
+    candidates = aco.candidate_lists()
+    if aco.pheromone_storage == 'sparse' or candidates is not None:
+        if aco.pheromone_storage == 'sparse':
+            values = aco.pheromones.candidate_values()
+        else:
+            values = np.take_along_axis(np.asarray(aco.pheromones), candidates, axis=1)
+        rows = np.repeat(np.arange(len(candidates)), candidates.shape[1])
+        cols = candidates.ravel()
+        values = values.ravel()
+        # An edge is listed twice when both ends have the other as a candidate
+        low, high = np.minimum(rows, cols), np.maximum(rows, cols)
+        _, first = np.unique(low * aco.num_cities + high, return_index=True)
+        rows, cols, values = low[first], high[first], values[first]
+    else:
+        pheromones = np.asarray(aco.pheromones)
+        rows, cols = np.nonzero(np.triu(pheromones, 1) > 0)
+        values = pheromones[rows, cols]
+
+    strongest = values.max() if len(values) else 0
+    if not strongest > 0:
+        empty = np.empty(0, dtype=int)
+        return empty, empty, np.empty(0)
+    strengths = values / strongest
+    keep = np.flatnonzero(strengths > threshold)
+    if len(keep) > limit:
+        keep = keep[np.argpartition(strengths[keep], -limit)[-limit:]]
+    keep = keep[np.argsort(-strengths[keep], kind='stable')]
+    return rows[keep], cols[keep], strengths[keep]
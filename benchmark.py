@@ -0,0 +1,286 @@
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import tsplib
+from aco import ACO, LOCAL_SEARCH_MOVES
+from kernels import BACKENDS, HAVE_NUMBA
+from strategies import STRATEGIES
+from config import DEFAULT_NUM_ANTS, DEFAULT_ALPHA, DEFAULT_BETA, DEFAULT_EVAPORATION_RATE, DEFAULT_Q
+
+# Benchmark harness for ACO.run_iteration.
+#   python benchmark.py run --suite quick --tsp-dir tsplib/ -o before.json
+#   python benchmark.py compare before.json after.json
+# Every case records throughput, peak memory, the time to reach each target gap over the known
+# optimum (TSPLIB only) and the convergence curve. compare flags metrics that got worse.
+
+# Optimal tour lengths of the TSPLIB instances used by the suites
+KNOWN_OPTIMA = {
+    'eil51': 426,
+    'berlin52': 7542,
+    'st70': 675,
+    'kroA100': 21282,
+    'ch150': 6528,
+    'a280': 2579,
+    'pcb442': 50778,
+    'rat783': 8806,
+    'pr1002': 259045,
+    'fl1577': 22249,
+    'pr2392': 378032,
+    'pcb3038': 137694,
+    'fnl4461': 182566,
+}
+
+# (kind, size or TSPLIB name); TSPLIB files are looked up as <tsp-dir>/<name>.tsp
+SUITES = {
+    'quick': [('random', 50), ('random', 200), ('grid', 200), ('tsplib', 'eil51'), ('tsplib', 'kroA100')],
+    'full': [('random', 50), ('random', 200), ('random', 1000), ('random', 5000),
+             ('grid', 200), ('grid', 1000), ('grid', 5000)] + [('tsplib', name) for name in KNOWN_OPTIMA],
+}
+
+TARGET_GAPS = (0.10, 0.05, 0.02, 0.01)
+
+# Metrics compare() checks, and whether larger values are better
+METRICS = {
+    'iterations_per_second': True,
+    'ant_steps_per_second': True,
+    'peak_memory_bytes': False,
+    'best_distance': False,
+}
+
+
+def solver_options(args):
+    return dict(
+        candidate_k=args.candidates,
+        strategy=args.strategy,
+        local_search=args.local_search,
+        backend=args.backend,
+        workers=args.ant_workers,
+    )
+
+
+def case_factory(kind, size, args):
+    # (case name, number of cities, function building a fresh solver, known optimum),
+    # or None if the instance is missing
+    options = solver_options(args)
+    params = (args.ants, DEFAULT_ALPHA, DEFAULT_BETA, DEFAULT_EVAPORATION_RATE, DEFAULT_Q)
+
+    if kind == 'tsplib':
+        path = os.path.join(args.tsp_dir, f"{size}.tsp") if args.tsp_dir else None
+        if path is None or not os.path.exists(path):
+            return None
+        instance = tsplib.load_tsp(path)
+        return (f"tsplib-{size}", instance.dimension,
+                lambda: ACO(instance.dimension, *params, 0, 0, rng=args.seed, **instance.solver_kwargs(), **options),
+                KNOWN_OPTIMA.get(size))
+
+    if kind == 'grid':
+        # Enough grid points for every city inside generate_cities' 50 px padding
+        spacing = 20
+        side = 100 + spacing * math.ceil(math.sqrt(2 * size))
+        return (f"grid-{size}", size,
+                lambda: ACO(size, *params, side, side, grid_spacing=spacing, rng=args.seed, **options),
+                None)
+
+    side = max(1000, int(50 * math.sqrt(size)))
+    return f"random-{size}", size, lambda: ACO(size, *params, side, side, rng=args.seed, **options), None
+
+
+def peak_memory(make_solver, iterations):
+    # Peak traced allocation while building the solver and running a few iterations (its own pass,
+    # so tracing does not slow the timed run)
+    tracemalloc.start()
+    try:
+        aco = make_solver()
+        try:
+            for _ in range(iterations):
+                aco.run_iteration()
+        finally:
+            aco.close()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_case(name, make_solver, optimum, args):
+    result = {'name': name, 'known_optimum': optimum}
+    result['peak_memory_bytes'] = peak_memory(make_solver, args.memory_iterations)
+
+    setup_start = time.perf_counter()
+    aco = make_solver()
+    result['setup_seconds'] = time.perf_counter() - setup_start
+
+    # [seconds, iteration, best distance] at every improvement
+    curve = []
+    seconds_to_gap = {str(gap): None for gap in TARGET_GAPS}
+    start = time.perf_counter()
+    try:
+        while aco.iteration < args.iterations:
+            elapsed = time.perf_counter() - start
+            if elapsed >= args.time_limit:
+                break
+            best = aco.best_distance
+            aco.run_iteration()
+            if aco.best_distance < best:
+                elapsed = time.perf_counter() - start
+                curve.append([elapsed, aco.iteration, aco.best_distance])
+                if optimum:
+                    for gap in TARGET_GAPS:
+                        if seconds_to_gap[str(gap)] is None and aco.best_distance <= optimum * (1 + gap):
+                            seconds_to_gap[str(gap)] = elapsed
+    finally:
+        aco.close()
+    elapsed = time.perf_counter() - start
+
+    result.update(
+        num_cities=aco.num_cities,
+        num_ants=aco.num_ants,
+        iterations=aco.iteration,
+        elapsed_seconds=elapsed,
+        iterations_per_second=aco.iteration / elapsed if elapsed > 0 else None,
+        ant_steps_per_second=aco.iteration * aco.num_ants * aco.num_cities / elapsed if elapsed > 0 else None,
+        construction_seconds=aco.construction_time,
+        local_search_seconds=aco.local_search_time,
+        best_distance=aco.best_distance if aco.best_tour is not None else None,
+        gap=aco.best_distance / optimum - 1 if optimum and aco.best_tour is not None else None,
+        seconds_to_gap=seconds_to_gap if optimum else None,
+        convergence=curve,
+    )
+    return result
+
+
+def run_benchmarks(args):
+    # Warm-up, so JIT compilation (backend numba) is not charged to the first case
+    _, _, make_solver, _ = case_factory('random', 20, args)
+    warm_up = make_solver()
+    warm_up.run_iteration()
+    warm_up.close()
+
+    cases = []
+    for kind, size in SUITES[args.suite]:
+        case = case_factory(kind, size, args)
+        if case is None:
+            print(f"skip {kind} {size}: no {size}.tsp in --tsp-dir", file=sys.stderr)
+            continue
+        name, num_cities, make_solver, optimum = case
+        if args.max_cities and num_cities > args.max_cities:
+            continue
+        result = run_case(name, make_solver, optimum, args)
+        print(f"{name}: {result['iterations_per_second']:.2f} it/s, {result['ant_steps_per_second']:.0f} steps/s, "
+              f"peak {result['peak_memory_bytes'] / 2 ** 20:.1f} MiB, best {result['best_distance']}", file=sys.stderr)
+        cases.append(result)
+
+    report = {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'numba': HAVE_NUMBA,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'config': {
+            'suite': args.suite, 'ants': args.ants, 'iterations': args.iterations, 'time_limit': args.time_limit,
+            'seed': args.seed, **solver_options(args),
+        },
+        'cases': cases,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=1)
+
+
+def compare(baseline, candidate, threshold):
+    # (lines to print, number of regressions) for two benchmark reports
+    old_cases = {case['name']: case for case in baseline['cases']}
+    new_names = {case['name'] for case in candidate['cases']}
+    lines = []
+    regressions = 0
+    for case in candidate['cases']:
+        old = old_cases.get(case['name'])
+        if old is None:
+            continue
+        checks = [(metric, larger_is_better) for metric, larger_is_better in METRICS.items()]
+        for gap in TARGET_GAPS:
+            checks.append((f"seconds_to_gap[{gap}]", False))
+        for metric, larger_is_better in checks:
+            before, after = _metric(old, metric), _metric(case, metric)
+            if before is not None and after is None and metric.startswith('seconds_to_gap['):
+                # The baseline reached this gap and the candidate never did
+                regressions += 1
+                lines.append(f"{case['name']:<20} {metric:<24} {before:>14.4g} {'never':>14} {'':>8} REGRESSION")
+                continue
+            if before is None or after is None or before == 0:
+                continue
+            change = after / before - 1
+            worse = -change if larger_is_better else change
+            flag = 'REGRESSION' if worse > threshold else ''
+            regressions += bool(flag)
+            lines.append(f"{case['name']:<20} {metric:<24} {before:>14.4g} {after:>14.4g} {change:>+8.1%} {flag}")
+    for name in old_cases:
+        if name not in new_names:
+            lines.append(f"{name:<20} missing from the candidate results")
+    return lines, regressions
+
+
+def _metric(case, metric):
+    if metric.startswith('seconds_to_gap['):
+        return (case.get('seconds_to_gap') or {}).get(metric[len('seconds_to_gap['):-1])
+    return case.get(metric)
+
+
+def run_compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    lines, regressions = compare(baseline, candidate, args.threshold)
+    print(f"{'case':<20} {'metric':<24} {'baseline':>14} {'candidate':>14} {'change':>8}")
+    for line in lines:
+        print(line)
+    print(f"{regressions} regression(s) beyond {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python benchmark.py', description='ACO throughput and quality benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run a benchmark suite and write the results as JSON')
+    run_parser.add_argument('--suite', choices=sorted(SUITES), default='quick')
+    run_parser.add_argument('--tsp-dir', help='directory with TSPLIB .tsp files (missing instances are skipped)')
+    run_parser.add_argument('--max-cities', type=int, default=None, help='skip cases larger than this')
+    run_parser.add_argument('--iterations', type=int, default=100, help='iterations per case')
+    run_parser.add_argument('--time-limit', type=float, default=30.0, help='seconds per case')
+    run_parser.add_argument('--memory-iterations', type=int, default=2, help='iterations in the memory pass')
+    run_parser.add_argument('--ants', type=int, default=DEFAULT_NUM_ANTS)
+    run_parser.add_argument('--candidates', type=int, default=None, help='candidate list size k')
+    run_parser.add_argument('--strategy', choices=sorted(STRATEGIES), default='as')
+    run_parser.add_argument('--local-search', choices=sorted(LOCAL_SEARCH_MOVES), default=None)
+    run_parser.add_argument('--backend', choices=BACKENDS, default='auto')
+    run_parser.add_argument('--ant-workers', type=int, default=1)
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('-o', '--output', required=True)
+    run_parser.set_defaults(handler=run_benchmarks)
+
+    compare_parser = commands.add_parser('compare', help='flag regressions between two result files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('candidate')
+    compare_parser.add_argument('--threshold', type=float, default=0.10, help='relative change counted as a regression')
+    compare_parser.set_defaults(handler=run_compare)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.handler(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+import importlib
+import json
+import os
+import uuid
+
+import numpy as np
+
+from aco import ACO, SparsePheromones
+from kernels import resolve_backend
+from strategies import STRATEGIES
+
+# Checkpoints of a running ACO, stored in a directory:
+#   state.npz              parameters, search state and RNG state, plus the small arrays
+#                          (coordinates, best tour, candidate lists, sparse pheromone store)
+#   pheromones-<id>.npy    the dense pheromone matrix
+#   distances-<id>.npy     the distance matrix, written once per instance
+# The large matrices are raw .npy files so load_checkpoint can memory-map them. Every file is
+# written under a temporary name and renamed into place; state.npz is renamed last and names
+# the matrix files it belongs to, so a crash mid-save leaves the previous checkpoint intact.
+
+STATE_FILE = 'state.npz'
+
+# Constructor arguments saved with every checkpoint
+PARAMS = ('num_cities', 'num_ants', 'alpha', 'beta', 'evaporation_rate', 'q', 'width', 'height', 'grid_spacing',
+          'vectorized', 'candidate_k', 'lazy_distances', 'distance_cache_rows', 'pheromone_storage',
+          'local_search', 'local_search_ants', 'backend', 'workers')
+
+# Search progress restored on load
+PROGRESS = ('iteration', 'last_improvement_iter', 'best_distance', 'construction_time', 'local_search_time',
+            'local_search_gain')
+
+
+class Checkpointer:
+    # Writes checkpoints of an ACO into directory, every `interval` iterations when used with maybe_save()
+    def __init__(self, directory, interval=None):
+        self.directory = directory
+        self.interval = interval
+        # (distance matrix object, file name) of the last distances written, so they are written once
+        self._distances = (None, None)
+        os.makedirs(directory, exist_ok=True)
+
+    def maybe_save(self, aco):
+        if self.interval and aco.iteration > 0 and aco.iteration % self.interval == 0:
+            self.save(aco)
+            return True
+        return False
+
+    def save(self, aco):
+        meta = {
+            'params': {name: getattr(aco, name) for name in PARAMS},
+            'progress': {name: getattr(aco, name) for name in PROGRESS},
+            'distance_dtype': np.dtype(aco.distance_dtype).str,
+            'distance_metric': _function_name(aco.distance_metric),
+            'fixed_instance': aco.fixed_instance,
+            'explicit_distances': aco.explicit_distances,
+            'strategy': {'name': aco.strategy.name, 'state': vars(aco.strategy)},
+            'rng': aco.rng.bit_generator.state,
+        }
+        arrays = {}
+        if aco.cities is not None:
+            arrays['cities'] = aco.cities
+        if aco.best_tour is not None:
+            arrays['best_tour'] = np.asarray(aco.best_tour, dtype=np.int64)
+        candidates = aco.candidate_lists()
+        if candidates is not None:
+            arrays['candidates'] = candidates
+
+        if not aco.lazy_distances:
+            distances, name = self._distances
+            if distances is not aco.distances or not os.path.exists(os.path.join(self.directory, name)):
+                # A resumed solver maps the distances file of this directory; distances are never
+                # changed in place, so that file is still current
+                name = self._mapped_file(aco.distances) or self._write_matrix('distances', aco.distances)
+                self._distances = (aco.distances, name)
+            meta['distances_file'] = name
+
+        if aco.pheromone_storage == 'sparse':
+            arrays.update(_sparse_arrays(aco.pheromones))
+            meta['sparse'] = {'initial': aco.pheromones.initial, 'history': aco.pheromones.history,
+                              'log_decay': aco.pheromones.log_decay, 'last_prune': aco.pheromones._last_prune}
+        else:
+            meta['pheromones_file'] = self._write_matrix('pheromones', aco.pheromones)
+
+        arrays['meta'] = np.array(json.dumps(meta))
+        _atomic_write(os.path.join(self.directory, STATE_FILE), lambda f: np.savez(f, **arrays))
+        self._remove_stale(meta, aco)
+
+    def _write_matrix(self, kind, matrix):
+        name = f"{kind}-{uuid.uuid4().hex[:12]}.npy"
+        _atomic_write(os.path.join(self.directory, name), lambda f: np.save(f, np.asarray(matrix)))
+        return name
+
+    def _mapped_file(self, matrix):
+        # Name of the file in this directory that matrix memory-maps as a whole, or None
+        while not isinstance(matrix, np.memmap) and isinstance(getattr(matrix, 'base', None), np.ndarray) and \
+                matrix.base.shape == matrix.shape:
+            matrix = matrix.base
+        if not isinstance(matrix, np.memmap) or matrix.filename is None:
+            return None
+        directory, name = os.path.split(os.path.abspath(matrix.filename))
+        return name if directory == os.path.abspath(self.directory) else None
+
+    def _remove_stale(self, meta, aco):
+        # Matrix files no longer named by state.npz. Files the solver still maps (e.g. the
+        # pheromones it was resumed from) are kept until a later save, as are files the OS refuses
+        # to remove (Windows does not remove mapped files).
+        keep = {meta.get('pheromones_file'), meta.get('distances_file'),
+                self._mapped_file(aco.pheromones), self._mapped_file(aco.distances)}
+        for name in os.listdir(self.directory):
+            if name.endswith('.npy') and name.startswith(('pheromones-', 'distances-')) and name not in keep:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+
+def save_checkpoint(aco, directory):
+    Checkpointer(directory).save(aco)
+
+
+def load_checkpoint(directory, mmap=True):
+    # ACO in the state of the last checkpoint in directory. With mmap the pheromone and distance
+    # matrices are memory-mapped copy-on-write, so loading does not read them and the solver's
+    # updates never touch the files.
+    with np.load(os.path.join(directory, STATE_FILE)) as state:
+        arrays = {name: state[name] for name in state.files}
+    meta = json.loads(str(arrays.pop('meta')))
+    params = meta['params']
+    mmap_mode = 'c' if mmap else None
+
+    kwargs = dict(params)
+    try:
+        resolve_backend(params['backend'])
+    except ValueError:
+        # Saved on a host with Numba; both backends give the same tours, so continue with NumPy
+        kwargs['backend'] = 'auto'
+    kwargs.update(
+        distance_dtype=np.dtype(meta['distance_dtype']).type,
+        distance_metric=_resolve_function(meta['distance_metric']),
+        cities=arrays.get('cities'),
+        neighbours=arrays.get('candidates'),
+        strategy=_strategy(meta['strategy']),
+        rng=_generator(meta['rng']),
+    )
+    if 'distances_file' in meta:
+        kwargs['distances'] = np.load(os.path.join(directory, meta['distances_file']), mmap_mode=mmap_mode)
+    if 'pheromones_file' in meta:
+        kwargs['pheromones'] = np.load(os.path.join(directory, meta['pheromones_file']), mmap_mode=mmap_mode)
+    else:
+        kwargs['pheromones'] = _sparse_store(arrays, meta['sparse'])
+
+    num_cities = kwargs.pop('num_cities')
+    positional = [kwargs.pop(name) for name in ('num_ants', 'alpha', 'beta', 'evaporation_rate', 'q', 'width', 'height')]
+    aco = ACO(num_cities, *positional, **kwargs)
+    aco.fixed_instance = meta['fixed_instance']
+    aco.explicit_distances = meta['explicit_distances']
+
+    for name, value in meta['progress'].items():
+        setattr(aco, name, value)
+    if 'best_tour' in arrays:
+        aco.best_tour = arrays['best_tour'].tolist()
+    return aco
+
+
+def warm_start(aco, directory, weight=None):
+    # Seed aco from the checkpoint in directory, e.g. yesterday's run on a slightly different
+    # instance; cities are matched by coordinates when both instances have them (see ACO.warm_start)
+    previous = load_checkpoint(directory)
+    cities = previous.cities if aco.cities is not None and previous.cities is not None else None
+    aco.warm_start(previous.best_tour, previous.pheromones, cities, weight)
+    previous.close()
+
+
+def _atomic_write(path, write):
+    temporary = f"{path}.tmp-{uuid.uuid4().hex[:8]}"
+    try:
+        with open(temporary, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def _sparse_arrays(store):
+    edges = list(store.extra)
+    return {
+        'sparse_values': store.values,
+        'sparse_stamps': store.stamps,
+        'sparse_extra_edges': np.array(edges, dtype=np.int64).reshape(-1, 2),
+        'sparse_extra_entries': np.array([store.extra[edge] for edge in edges], dtype=float).reshape(-1, 3),
+    }
+
+
+def _sparse_store(arrays, meta):
+    store = SparsePheromones(arrays['candidates'], meta['initial'], meta['history'])
+    store.values = arrays['sparse_values']
+    store.stamps = arrays['sparse_stamps']
+    store.log_decay = meta['log_decay']
+    store._last_prune = meta['last_prune']
+    store.extra = {(int(i), int(j)): [value, stamp, int(iteration)]
+                   for (i, j), (value, stamp, iteration) in zip(arrays['sparse_extra_edges'].tolist(),
+                                                                  arrays['sparse_extra_entries'].tolist())}
+    return store
+
+
+def _strategy(saved):
+    if saved['name'] not in STRATEGIES:
+        raise ValueError(f"checkpoint uses an unknown strategy {saved['name']!r}")
+    strategy = STRATEGIES[saved['name']]()
+    vars(strategy).update(saved['state'])
+    return strategy
+
+
+def _generator(state):
+    bit_generator = getattr(np.random, state['bit_generator'])()
+    bit_generator.state = state
+    return np.random.Generator(bit_generator)
+
+
+def _function_name(function):
+    if function is None:
+        return None
+    return f"{function.__module__}:{function.__qualname__}"
+
+
+def _resolve_function(name):
+    if name is None:
+        return None
+    module, qualname = name.split(':')
+    function = importlib.import_module(module)
+    for part in qualname.split('.'):
+        function = getattr(function, part)
+    return function
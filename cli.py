@@ -0,0 +1,233 @@
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+import tsplib
+from aco import ACO, LOCAL_SEARCH_MOVES
+from checkpoint import Checkpointer, load_checkpoint, warm_start
+from kernels import BACKENDS
+from parallel import IslandModel
+from stopping import StoppingCriteria
+from strategies import STRATEGIES, AntColonySystem
+from config import (DEFAULT_NUM_ANTS, DEFAULT_ALPHA, DEFAULT_BETA, DEFAULT_EVAPORATION_RATE, DEFAULT_Q,
+                    DEFAULT_NUM_CITIES, SCREEN_WIDTH, SCREEN_HEIGHT, UI_WIDTH, ITERATION_CUTOFF)
+
+# Headless entry point: python -m aco solve ...
+# Runs ACO.run_iteration in a tight loop with no rendering and writes the result as JSON.
+# Nothing here may import pygame, pygame_gui or matplotlib.
+
+
+def load_coordinates(path):
+    # Plain text, one "x y" pair per line; '#' starts a comment
+    return np.loadtxt(path, dtype=float, comments='#', ndmin=2)[:, :2]
+
+
+def build_solver(args):
+    options = dict(
+        vectorized=not args.serial,
+        candidate_k=args.candidates,
+        distance_dtype=np.float32 if args.float32 else np.float64,
+        lazy_distances=args.lazy_distances,
+        pheromone_storage='sparse' if args.sparse else 'dense',
+        workers=args.ant_workers,
+        local_search=args.local_search,
+        local_search_ants=args.ls_ants,
+        backend=args.backend,
+        rng=args.seed,
+        profile=args.profile,
+        strategy=AntColonySystem(q0=args.q0) if args.strategy == 'acs' and args.q0 is not None else args.strategy,
+    )
+    if args.tsp:
+        instance = tsplib.load_tsp(args.tsp, options['distance_dtype'])
+        return ACO(instance.dimension, args.ants, args.alpha, args.beta, args.evaporation, args.q,
+                   0, 0, **instance.solver_kwargs(), **options), instance
+    if args.coords:
+        cities = load_coordinates(args.coords)
+        width, height = np.ptp(cities, axis=0)
+        return ACO(len(cities), args.ants, args.alpha, args.beta, args.evaporation, args.q,
+                   width, height, cities=cities, **options), None
+    return ACO(args.cities, args.ants, args.alpha, args.beta, args.evaporation, args.q,
+               args.width, args.height, grid_spacing=args.grid_spacing, **options), None
+
+
+def stopping_criteria(args):
+    return StoppingCriteria(
+        max_iterations=args.iterations,
+        time_limit=args.time_limit,
+        target=args.target,
+        cutoff=None if args.cutoff < 0 else args.cutoff,
+        window=args.window,
+        min_improvement=args.min_improvement,
+        min_branching=args.min_branching,
+        min_entropy=args.min_entropy,
+        check_every=args.check_every,
+    )
+
+
+def solve(aco, stopping, checkpointer=None):
+    # Iterate until a criterion fires; returns (stop reason, best distance after each iteration).
+    # max_iterations counts from iteration 0, so a resumed solver only runs the remainder.
+    history = []
+
+    def after_iteration(aco):
+        history.append(aco.best_distance)
+        if checkpointer is not None:
+            checkpointer.maybe_save(aco)
+
+    return aco.run(stopping, after_iteration), history
+
+
+def run_solve(args):
+    setup_start = time.perf_counter()
+    if args.resume:
+        aco, instance = load_checkpoint(args.resume), None
+    else:
+        aco, instance = build_solver(args)
+        if args.warm_start:
+            warm_start(aco, args.warm_start)
+    setup_seconds = time.perf_counter() - setup_start
+
+    cutoff = None if args.cutoff < 0 else args.cutoff
+    if args.colonies > 1:
+        islands = IslandModel(aco, args.colonies, args.migration_interval, args.migration_weight,
+                              max_workers=args.workers, seed=args.seed)
+        result = islands.run(args.iterations, args.time_limit, cutoff)
+        result.update(instance=instance.name if instance else args.coords, num_cities=aco.num_cities,
+                      num_ants=aco.num_ants, setup_seconds=setup_seconds)
+        write_result(args, result, instance)
+        return
+
+    checkpoint_dir = args.checkpoint or args.resume
+    checkpointer = Checkpointer(checkpoint_dir, args.checkpoint_interval) if checkpoint_dir else None
+    start = time.perf_counter()
+    try:
+        reason, history = solve(aco, stopping_criteria(args), checkpointer)
+        if checkpointer is not None:
+            checkpointer.save(aco)
+    finally:
+        aco.close()
+    elapsed = time.perf_counter() - start
+
+    result = {
+        'instance': instance.name if instance else args.coords or args.resume,
+        'num_cities': aco.num_cities,
+        'num_ants': aco.num_ants,
+        'params': {'alpha': aco.alpha, 'beta': aco.beta, 'evaporation_rate': aco.evaporation_rate,
+                   'q': aco.q, 'strategy': aco.strategy.name, 'backend': aco.backend, 'candidate_k': aco.candidate_k,
+                   'local_search': aco.local_search, 'local_search_ants': aco.local_search_ants, 'seed': args.seed},
+        'stop_reason': reason,
+        'iterations': aco.iteration,
+        'best_distance': aco.best_distance if aco.best_tour is not None else None,
+        'best_found_at': aco.last_improvement_iter,
+        'best_tour': aco.best_tour,
+        'setup_seconds': setup_seconds,
+        'elapsed_seconds': elapsed,
+        'iterations_per_second': len(history) / elapsed if elapsed > 0 else None,
+        'construction_seconds': aco.construction_time,
+        'local_search_seconds': aco.local_search_time,
+        'local_search_gain': aco.local_search_gain,
+        'history': history,
+    }
+    if args.profile:
+        result['profile'] = aco.profile_snapshot()
+    write_result(args, result, instance)
+
+
+def write_result(args, result, instance):
+    if args.tour_out and result['best_tour'] is not None:
+        name = instance.name if instance else 'tour'
+        tsplib.write_tour(args.tour_out, result['best_tour'], name=f"{name}.tour",
+                          comment=f"Length {result['best_distance']} after {result['iterations']} ACO iterations")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f)
+        print(f"{result['stop_reason']} after {result['iterations']} iterations ({result['elapsed_seconds']:.2f}s, "
+              f"{result['iterations_per_second'] or 0:.1f} it/s): best distance {result['best_distance']}",
+              file=sys.stderr)
+    else:
+        json.dump(result, sys.stdout)
+        print()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m aco', description='Headless Ant Colony Optimization TSP solver')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    solve_parser = commands.add_parser('solve', help='run the solver and write the best tour as JSON')
+    instance = solve_parser.add_argument_group('instance')
+    instance.add_argument('--tsp', help='TSPLIB .tsp file (EUC_2D, CEIL_2D, ATT, GEO or EXPLICIT)')
+    instance.add_argument('--coords', help='text file with one "x y" line per city (default: random cities)')
+    instance.add_argument('--cities', type=int, default=DEFAULT_NUM_CITIES, help='number of random cities')
+    instance.add_argument('--width', type=int, default=SCREEN_WIDTH - UI_WIDTH)
+    instance.add_argument('--height', type=int, default=SCREEN_HEIGHT)
+    instance.add_argument('--grid-spacing', type=int, default=None, help='snap random cities to a grid')
+
+    params = solve_parser.add_argument_group('parameters')
+    params.add_argument('--ants', type=int, default=DEFAULT_NUM_ANTS)
+    params.add_argument('--alpha', type=float, default=DEFAULT_ALPHA)
+    params.add_argument('--beta', type=float, default=DEFAULT_BETA)
+    params.add_argument('--evaporation', type=float, default=DEFAULT_EVAPORATION_RATE)
+    params.add_argument('--q', type=float, default=DEFAULT_Q)
+    params.add_argument('--strategy', choices=sorted(STRATEGIES), default='as',
+                        help='pheromone rule: Ant System, MAX-MIN Ant System or Ant Colony System')
+    params.add_argument('--q0', type=float, default=None, help='ACS exploitation probability (default 0.9)')
+    params.add_argument('--candidates', type=int, default=None, help='candidate list size k')
+    params.add_argument('--serial', action='store_true', help='build tours one ant at a time')
+    params.add_argument('--float32', action='store_true', help='store distances as float32')
+    params.add_argument('--lazy-distances', action='store_true', help='compute distances on demand (needs --candidates)')
+    params.add_argument('--sparse', action='store_true', help='sparse pheromone storage (needs --candidates)')
+    params.add_argument('--backend', choices=BACKENDS, default='auto',
+                        help='numba: compiled construction kernels (default: numba when installed)')
+    params.add_argument('--ant-workers', type=int, default=1, help="build each iteration's tours in this many processes")
+    params.add_argument('--local-search', choices=sorted(LOCAL_SEARCH_MOVES), default=None,
+                        help='improve every tour with these moves before the pheromone update')
+    params.add_argument('--ls-ants', type=int, default=None, help='only improve the shortest N tours of each iteration')
+    params.add_argument('--seed', type=int, default=None)
+    params.add_argument('--profile', action='store_true', help='add per-phase timings and counters to the result')
+
+    limits = solve_parser.add_argument_group('stopping')
+    limits.add_argument('--iterations', type=int, default=None, help='maximum number of iterations')
+    limits.add_argument('--time-limit', type=float, default=None, help='wall-clock budget in seconds')
+    limits.add_argument('--cutoff', type=int, default=ITERATION_CUTOFF,
+                        help='stop after this many iterations without improvement (-1 disables)')
+    limits.add_argument('--target', type=float, default=None, help='stop once the best distance is at most this')
+    limits.add_argument('--window', type=int, default=None,
+                        help='stop when the best distance improved by less than --min-improvement over this many iterations')
+    limits.add_argument('--min-improvement', type=float, default=0.001, help='relative improvement for --window')
+    limits.add_argument('--min-branching', type=float, default=None,
+                        help='stop when the mean lambda-branching factor of the trails drops below this (e.g. 2.5)')
+    limits.add_argument('--min-entropy', type=float, default=None,
+                        help='stop when the mean normalized trail entropy drops below this (0-1)')
+    limits.add_argument('--check-every', type=int, default=10, help='iterations between trail (branching/entropy) checks')
+
+    checkpoints = solve_parser.add_argument_group('checkpoints')
+    checkpoints.add_argument('--checkpoint', help='directory to save the solver state in')
+    checkpoints.add_argument('--checkpoint-interval', type=int, default=50, help='iterations between checkpoints')
+    checkpoints.add_argument('--resume', help='continue from the checkpoint in this directory (keeps checkpointing there '
+                                             'unless --checkpoint is given); instance and parameter options are ignored')
+    checkpoints.add_argument('--warm-start', help='seed the pheromones and best tour from the checkpoint in this directory, '
+                                                  'taken on the same or a slightly changed instance')
+
+    islands = solve_parser.add_argument_group('island model')
+    islands.add_argument('--colonies', type=int, default=1, help='independent colonies run in worker processes')
+    islands.add_argument('--migration-interval', type=int, default=10, help='iterations between best-tour migrations')
+    islands.add_argument('--migration-weight', type=float, default=1.0, help='scale of the migrated deposit')
+    islands.add_argument('--workers', type=int, default=None, help='worker processes (default: one per colony)')
+
+    solve_parser.add_argument('-o', '--output', help='write the JSON result here instead of stdout')
+    solve_parser.add_argument('--tour-out', help='also write the best tour as a TSPLIB .tour file')
+    solve_parser.set_defaults(handler=run_solve)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
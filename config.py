@@ -1,5 +1,3 @@
-import pygame
-
 # Screen settings
 SCREEN_WIDTH = 1200
 SCREEN_HEIGHT = 800
@@ -36,6 +34,15 @@ DEFAULT_NUM_CITIES = 8
 DEFAULT_GRID_SPACING = 100
 DEFAULT_ANIMATION_SPEED = 200.0
 ITERATION_CUTOFF = 30 # Iterations without improvement to consider converged
+MAX_PHEROMONE_EDGES = 2000 # Only the strongest pheromone edges are drawn
+TEXT_CACHE_SIZE = 2048 # Rendered text surfaces kept by the visualizer
+ANT_ROTATIONS = 72 # Pre-rotated ant images, one every 5 degrees
+MAX_CITIES = 5000 # Upper end of the Number of Cities slider
+LOD_CITIES = 200 # Level of detail mode above this many cities...
+LOD_FRAME_TIME = 1 / 30 # ...or once drawing a frame takes longer than this (seconds)
+LOD_PHEROMONE_EDGES = 300 # Pheromone edges drawn in level of detail mode
+LOD_ANTS = 10 # Ants animated in level of detail mode
+CANDIDATE_K = 15 # Above LOD_CITIES ants choose among their nearest CANDIDATE_K cities
 
 # UI Settings
 UI_WIDTH = 300
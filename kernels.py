@@ -0,0 +1,165 @@
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # Optional: without Numba the NumPy code in aco.py is used
+    njit = None
+
+# Compiled (Numba nopython) versions of the hot loops in aco.py: tour construction, tour lengths
+# and the pheromone deposit. They take the same per-ant random numbers (aco.ant_draws) and do the
+# same floating-point operations as the NumPy code, so for a given seed both backends produce
+# identical tours. Tours come back as int32.
+
+HAVE_NUMBA = njit is not None
+BACKENDS = ('auto', 'numpy', 'numba')
+
+
+def resolve_backend(backend):
+    # 'auto' picks Numba when it is installed
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown backend {backend!r}")
+    if backend == 'auto':
+        return 'numba' if HAVE_NUMBA else 'numpy'
+    if backend == 'numba' and not HAVE_NUMBA:
+        raise ValueError("the numba backend needs the numba package")
+    return backend
+
+
+def construct_tours(choice_info, candidates, distances, starts, uniforms, profiler=None):
+    # Drop-in for aco.construct_tours without q0 / after_step
+    if candidates is None:
+        tours, fallbacks = _construct_dense(starts, uniforms, choice_info)
+        counter = 'uniform_fallbacks'
+    else:
+        tours, fallbacks = _construct_candidates(starts, uniforms, choice_info, candidates, distances)
+        counter = 'nearest_fallbacks'
+    if profiler is not None and fallbacks:
+        profiler.count(counter, int(fallbacks))
+    return tours
+
+
+def tour_lengths(distances, tours):
+    return _tour_lengths(distances, tours)
+
+
+def deposit(pheromones, tours, deposits):
+    # pheromones[a][b] and [b][a] += deposits[t] for every edge (a, b) of tour t, in place
+    _deposit(pheromones, tours, np.asarray(deposits, dtype=np.float64))
+
+
+def _roulette(cumulative, total, u):
+    # First slot whose running total exceeds u * total, threshold kept strictly below the total
+    threshold = min(u * total, np.nextafter(total, 0.0))
+    pick = 0
+    for value in cumulative:
+        if value <= threshold:
+            pick += 1
+    return pick
+
+
+def _construct_dense(starts, uniforms, choice_info):
+    # (tours, number of steps that fell back to a uniform choice)
+    num_ants = len(starts)
+    fallbacks = 0
+    n = choice_info.shape[0]
+    tours = np.empty((num_ants, n), dtype=np.int32)
+    visited = np.zeros((num_ants, n), dtype=np.bool_)
+    current = starts.copy()
+    cumulative = np.empty(n)
+    for ant in range(num_ants):
+        tours[ant, 0] = current[ant]
+        visited[ant, current[ant]] = True
+
+    for step in range(1, n):
+        for ant in range(num_ants):
+            row = choice_info[current[ant]]
+            total = 0.0
+            for city in range(n):
+                if not visited[ant, city]:
+                    total += row[city]
+                cumulative[city] = total
+            if total == 0:
+                # Uniform over the unvisited cities
+                fallbacks += 1
+                total = 0.0
+                for city in range(n):
+                    if not visited[ant, city]:
+                        total += 1.0
+                    cumulative[city] = total
+            city = _roulette(cumulative, total, uniforms[ant, step - 1])
+            current[ant] = city
+            tours[ant, step] = city
+            visited[ant, city] = True
+    return tours, fallbacks
+
+
+def _construct_candidates(starts, uniforms, choice_info, candidates, distances):
+    # (tours, number of steps that fell back to the nearest unvisited city)
+    num_ants = len(starts)
+    fallbacks = 0
+    n, k = candidates.shape
+    tours = np.empty((num_ants, n), dtype=np.int32)
+    visited = np.zeros((num_ants, n), dtype=np.bool_)
+    current = starts.copy()
+    cumulative = np.empty(k)
+    for ant in range(num_ants):
+        tours[ant, 0] = current[ant]
+        visited[ant, current[ant]] = True
+
+    for step in range(1, n):
+        for ant in range(num_ants):
+            here = current[ant]
+            total = 0.0
+            for slot in range(k):
+                if not visited[ant, candidates[here, slot]]:
+                    total += choice_info[here, slot]
+                cumulative[slot] = total
+            if total == 0:
+                # Every candidate is used: nearest unvisited city
+                fallbacks += 1
+                city = -1
+                best = np.inf
+                for other in range(n):
+                    if not visited[ant, other] and distances[here, other] < best:
+                        best = distances[here, other]
+                        city = other
+                if city < 0:
+                    # Only unvisited cities at infinite distance left; argmin's first one
+                    for other in range(n):
+                        if not visited[ant, other]:
+                            city = other
+                            break
+            else:
+                city = candidates[here, _roulette(cumulative, total, uniforms[ant, step - 1])]
+            current[ant] = city
+            tours[ant, step] = city
+            visited[ant, city] = True
+    return tours, fallbacks
+
+
+def _tour_lengths(distances, tours):
+    num_tours, n = tours.shape
+    lengths = np.zeros(num_tours, dtype=np.int64)
+    for t in range(num_tours):
+        for i in range(n):
+            lengths[t] += np.int64(distances[tours[t, i], tours[t, (i + 1) % n]])
+    return lengths
+
+
+def _deposit(pheromones, tours, deposits):
+    num_tours, n = tours.shape
+    for t in range(num_tours):
+        for i in range(n):
+            a = tours[t, i]
+            b = tours[t, (i + 1) % n]
+            pheromones[a, b] += deposits[t]
+            pheromones[b, a] += deposits[t]
+
+
+if HAVE_NUMBA:
+    # nogil: a solver on a background thread (background.py) runs them alongside the render loop
+    _roulette = njit(cache=True, nogil=True)(_roulette)
+    _construct_dense = njit(cache=True, nogil=True)(_construct_dense)
+    _construct_candidates = njit(cache=True, nogil=True)(_construct_candidates)
+    _tour_lengths = njit(cache=True, nogil=True)(_tour_lengths)
+    _deposit = njit(cache=True, nogil=True)(_deposit)
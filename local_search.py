@@ -0,0 +1,193 @@
+from collections import deque
+
+import numpy as np
+
+# Local search for ant tours: 2-opt and Or-opt moves restricted to neighbour lists, with
+# don't-look bits (a queue of cities whose surroundings changed). Edge lengths are the same
+# integer-rounded distances ACO.calculate_tour_distance sums, so gains are exact tour length changes.
+
+MOVES = ('2-opt', 'or-opt')
+
+
+def edge_length(distances):
+    # Fast scalar lookup for a distance matrix or LazyDistances
+    if isinstance(distances, np.ndarray):
+        item = distances.item
+        return lambda a, b: int(item(a, b))
+    if hasattr(distances, 'row'):
+        # LazyDistances: go through its row cache
+        row = distances.row
+        return lambda a, b: int(row(a)[b])
+    return lambda a, b: int(distances[a, b])
+
+
+def improve_tour(tour, distances, neighbours, moves=MOVES):
+    # Apply the given moves until none improves the tour. neighbours: (n, k) nearest cities, nearest first.
+    # Returns (tour as a list, total length reduction).
+    dist = edge_length(distances)
+    neighbours = neighbours.tolist() if isinstance(neighbours, np.ndarray) else neighbours
+    tour = [int(city) for city in tour]
+    total_gain = 0
+    queue = list(tour)
+    while queue:
+        touched = set()
+        for move in moves:
+            tour, gain, changed = MOVE_FUNCTIONS[move](tour, dist, neighbours, queue)
+            total_gain += gain
+            touched.update(changed)
+        if len(moves) == 1:
+            # A single move type already runs to a local optimum
+            break
+        # Another round only around the cities the other move type changed
+        queue = list(touched)
+    return tour, total_gain
+
+
+def _positions(tour):
+    pos = [0] * len(tour)
+    for index, city in enumerate(tour):
+        pos[city] = index
+    return pos
+
+
+def _reverse(tour, pos, i, j):
+    # Reverse the cyclic segment running forward from position i to position j
+    n = len(tour)
+    length = (j - i) % n + 1
+    if 2 * length > n:
+        # Reversing the complement gives the same cycle and touches fewer cities
+        i, j = (j + 1) % n, (i - 1) % n
+        length = n - length
+    for _ in range(length // 2):
+        ci, cj = tour[i], tour[j]
+        tour[i], pos[cj] = cj, i
+        tour[j], pos[ci] = ci, j
+        i = (i + 1) % n
+        j = (j - 1) % n
+
+
+def two_opt(tour, dist, neighbours, queue):
+    # Replace edges (a, b), (c, d) by (a, c), (b, d) whenever that is shorter, looking at both tour
+    # neighbours of a and only at cities c closer to a than b is.
+    n = len(tour)
+    tour = list(tour)
+    pos = _positions(tour)
+    active = deque(queue)
+    queued = [False] * n
+    for city in active:
+        queued[city] = True
+    total_gain = 0
+    touched = set()
+
+    while active:
+        a = active.popleft()
+        queued[a] = False
+        for forward in (True, False):
+            i = pos[a]
+            b = tour[(i + 1) % n] if forward else tour[i - 1]
+            d_ab = dist(a, b)
+            improved = False
+            for c in neighbours[a]:
+                d_ac = dist(a, c)
+                if d_ac >= d_ab:
+                    break
+                j = pos[c]
+                d = tour[(j + 1) % n] if forward else tour[j - 1]
+                if c == b or d == a:
+                    continue
+                delta = d_ac + dist(b, d) - d_ab - dist(c, d)
+                if delta < 0:
+                    if forward:
+                        _reverse(tour, pos, (i + 1) % n, j)
+                    else:
+                        _reverse(tour, pos, i, (j - 1) % n)
+                    total_gain -= delta
+                    for city in (a, b, c, d):
+                        touched.add(city)
+                        if not queued[city]:
+                            queued[city] = True
+                            active.append(city)
+                    improved = True
+                    break
+            if improved:
+                break
+    return tour, total_gain, list(touched)
+
+
+def or_opt(tour, dist, neighbours, queue, max_segment=3):
+    # Move a run of 1..max_segment cities starting at a queued city next to one of the neighbours
+    # of its first or last city, in whichever orientation is shorter.
+    n = len(tour)
+    tour = list(tour)
+    pos = _positions(tour)
+    active = deque(queue)
+    queued = [False] * n
+    for city in active:
+        queued[city] = True
+    total_gain = 0
+    touched = set()
+
+    while active:
+        s = active.popleft()
+        queued[s] = False
+        for length in range(1, min(max_segment, n - 3) + 1):
+            i = pos[s]
+            segment = [tour[(i + t) % n] for t in range(length)]
+            e = segment[-1]
+            p = tour[i - 1]
+            nx = tour[(i + length) % n]
+            removal_gain = dist(p, s) + dist(e, nx) - dist(p, nx)
+            if removal_gain <= 0:
+                continue
+            move = _best_insertion(tour, pos, dist, neighbours, segment, removal_gain)
+            if move is None:
+                continue
+
+            c, after, reverse, added = move
+            rest = [tour[(i + length + t) % n] for t in range(n - length)]
+            index = (pos[c] - (i + length)) % n + (1 if after else 0)
+            tour = rest[:index] + (segment[::-1] if reverse else segment) + rest[index:]
+            pos = _positions(tour)
+            total_gain += removal_gain - added
+            neighbour = tour[(pos[c] + 1) % n] if after else tour[pos[c] - 1]
+            for city in (p, nx, s, e, c, neighbour):
+                touched.add(city)
+                if not queued[city]:
+                    queued[city] = True
+                    active.append(city)
+            break
+    return tour, total_gain, list(touched)
+
+
+def _best_insertion(tour, pos, dist, neighbours, segment, removal_gain):
+    # First insertion next to a neighbour of an end city that costs less than removing the segment saves.
+    # Returns (c, insert after c?, reversed?, added length) or None.
+    n = len(tour)
+    s, e = segment[0], segment[-1]
+    inside = set(segment)
+    for end, other in ((s, e), (e, s)):
+        for c in neighbours[end]:
+            d_end = dist(c, end)
+            if d_end >= removal_gain:
+                break
+            if c in inside:
+                continue
+            succ = tour[(pos[c] + 1) % n]
+            pred = tour[pos[c] - 1]
+            # c, end ... other, succ
+            if succ not in inside:
+                added = d_end + dist(other, succ) - dist(c, succ)
+                if added < removal_gain:
+                    return c, True, end == e, added
+            # pred, other ... end, c
+            if pred not in inside:
+                added = d_end + dist(pred, other) - dist(pred, c)
+                if added < removal_gain:
+                    return c, False, end == s, added
+    return None
+
+
+MOVE_FUNCTIONS = {
+    '2-opt': two_opt,
+    'or-opt': or_opt,
+}
@@ -1,3 +1,4 @@
+import time
 import pygame
 import pygame_gui
 import numpy as np
@@ -5,55 +6,97 @@ import matplotlib.pyplot as plt
 import matplotlib.ticker as mticker
 from config import *
 from aco import ACO
-import math
+from background import BackgroundSolver
+from stopping import StoppingCriteria
 
 class AntSprite(pygame.sprite.Sprite):
-    def __init__(self, image, start_pos, speed=5.0):
+    # One ant on screen; AntSwarm moves it and picks its pre-rotated image
+    def __init__(self, image, start_pos):
         super().__init__()
-        self.original_image = image
         self.image = image
         self.rect = self.image.get_rect(center=start_pos)
-        self.pos = np.array(start_pos, dtype=float)
-        self.target_pos = None
-        self.speed = speed
-        self.path = []
-        self.current_path_index = 0
-        self.finished = False
-
-    def set_path(self, path_coords):
-        self.path = path_coords
-        self.current_path_index = 0
-        if len(self.path) > 1:
-            self.target_pos = np.array(self.path[1], dtype=float)
-            self.update_rotation()
-
-    def update_rotation(self):
-        if self.target_pos is not None:
-            direction = self.target_pos - self.pos
-            angle = math.degrees(math.atan2(-direction[1], direction[0])) - 90
-            self.image = pygame.transform.rotate(self.original_image, angle)
-            self.rect = self.image.get_rect(center=self.rect.center)
 
-    def update(self):
-        if self.finished or not self.path:
+    def show(self, image, center):
+        self.image = image
+        self.rect = self.image.get_rect(center=center)
+
+class AntSwarm(pygame.sprite.Group):
+    # Ant sprites walking their tours. Positions, targets and speeds are NumPy arrays with a row
+    # per ant, so a frame moves every ant at once; an ant is re-rotated only when it reaches a city.
+    def __init__(self):
+        super().__init__()
+        self.empty()
+
+    def empty(self):
+        super().empty()
+        self.frames = None
+        self.paths = np.empty((0, 2, 2))
+        self.index = np.empty(0, dtype=int)
+        self.pos = np.empty((0, 2))
+        self.target_pos = np.empty((0, 2))
+        self.speeds = np.empty(0)
+
+    def start(self, tours, cities, frames, speed):
+        # frames: the ant image rotated through a full turn in equal steps (see create_assets)
+        self.empty()
+        tours = np.asarray(tours)
+        if tours.ndim != 2 or tours.shape[1] < 1:
             return
+        # Every tour plus the return to its start
+        self.paths = np.asarray(cities, dtype=float)[np.concatenate([tours, tours[:, :1]], axis=1)]
+        self.frames = frames
+        num_ants = len(self.paths)
+        self.index = np.zeros(num_ants, dtype=int)
+        self.pos = self.paths[:, 0].copy()
+        self.target_pos = self.paths[:, 1].copy()
+        self.speeds = np.full(num_ants, float(speed))
+        self.add(AntSprite(frames[0], center) for center in self.pos.tolist())
+        self.update_rotation(np.arange(num_ants))
+
+    def set_speed(self, speed):
+        self.speeds[:] = speed
+
+    @property
+    def finished(self):
+        return bool((self.index >= self.paths.shape[1] - 1).all())
+
+    def update_rotation(self, ants):
+        # Cached frame nearest to each ant's heading
+        direction = self.target_pos[ants] - self.pos[ants]
+        angles = np.degrees(np.arctan2(-direction[:, 1], direction[:, 0])) - 90
+        frames = np.rint(angles * len(self.frames) / 360).astype(int) % len(self.frames)
+        sprites = self.sprites()
+        for ant, frame, center in zip(ants.tolist(), frames.tolist(), self.pos[ants].tolist()):
+            sprites[ant].show(self.frames[frame], center)
 
-        direction = self.target_pos - self.pos
-        distance = np.linalg.norm(direction)
+    def update(self):
+        last = self.paths.shape[1] - 1
+        walking = np.flatnonzero(self.index < last)
+        if not len(walking):
+            return
 
-        if distance < self.speed:
-            self.pos = self.target_pos
-            self.current_path_index += 1
-            if self.current_path_index >= len(self.path) - 1:
-                self.finished = True
-            else:
-                self.target_pos = np.array(self.path[self.current_path_index + 1], dtype=float)
-                self.update_rotation()
-        else:
-            normalized_dir = direction / distance
-            self.pos += normalized_dir * self.speed
-        
-        self.rect.center = self.pos
+        direction = self.target_pos[walking] - self.pos[walking]
+        distance = np.hypot(direction[:, 0], direction[:, 1])
+        speed = self.speeds[walking]
+
+        # Ants within one step of their target arrive there, the others take a step towards it
+        arrived = distance < speed
+        moving = walking[~arrived]
+        self.pos[moving] += direction[~arrived] * (speed[~arrived] / distance[~arrived])[:, None]
+        reached = walking[arrived]
+        self.pos[reached] = self.target_pos[reached]
+        self.index[reached] += 1
+
+        # Ants with a next city turn towards it
+        turning = reached[self.index[reached] < last]
+        self.target_pos[turning] = self.paths[turning, self.index[turning] + 1]
+        self.update_rotation(turning)
+
+        sprites = self.sprites()
+        for ant, center in zip(moving.tolist(), self.pos[moving].tolist()):
+            sprites[ant].rect.center = center
+        for ant, center in zip(reached.tolist(), self.pos[reached].tolist()):
+            sprites[ant].rect.center = center
 
 class TSPVisualizer:
     def __init__(self):
@@ -81,7 +124,24 @@ class TSPVisualizer:
         self.visible_iteration = 0
         self.converged = False
         self.show_overlays = True
-        self.distance_history = []
+        self.show_profile = False # Press P to toggle the profiling overlay
+        self.animate_ants = True # Press A to toggle ant animations
+        # Pheromone and best-path layers, redrawn only for a new snapshot or window size
+        self.pheromone_layer = None
+        self.best_path_layer = None
+        self.layers_key = None
+        # Static layers: background with grid, and the city markers with their labels
+        self.background_layer = None
+        self.background_key = None
+        self.city_layer = None
+        self.city_key = None
+        # Rendered text by (text, size, color, bold), and fonts by (size, bold)
+        self.text_cache = {}
+        self.fonts = {}
+        # Level of detail mode for large instances (see update_lod)
+        self.lod = False
+        self.lod_cities = LOD_CITIES
+        self.frame_time = 0.0 # Moving average of the time to draw a frame, in seconds
 
         self.aco = ACO(
             DEFAULT_NUM_CITIES, 
@@ -92,10 +152,14 @@ class TSPVisualizer:
             DEFAULT_Q,
             SCREEN_WIDTH - UI_WIDTH, 
             SCREEN_HEIGHT,
-            grid_spacing=DEFAULT_GRID_SPACING # Grid on by default
+            grid_spacing=DEFAULT_GRID_SPACING, # Grid on by default
+            stopping=StoppingCriteria(cutoff=ITERATION_CUTOFF)
         )
+        # The solver iterates on its own thread; the frame loop draws its latest snapshot
+        self.solver = BackgroundSolver(self.aco, edge_limit=MAX_PHEROMONE_EDGES)
+        self.snapshot = self.solver.latest
         
-        self.ant_sprites = pygame.sprite.Group()
+        self.ant_sprites = AntSwarm()
         self.setup_ui()
 
     def handle_resize(self, width, height):
@@ -108,8 +172,12 @@ class TSPVisualizer:
         self.panel.set_dimensions(panel_rect.size)
         
         # Update ACO bounds for future generations
-        self.aco.width = width - UI_WIDTH
-        self.aco.height = height
+        sim_width = width - UI_WIDTH
+
+        def resize(aco):
+            aco.width = sim_width
+            aco.height = height
+        self.solver.submit(resize)
 
     def create_assets(self):
         # City Icon (Modern pin/marker style)
@@ -141,6 +209,9 @@ class TSPVisualizer:
         pygame.draw.line(self.ant_img, ANT_COLOR, (12, 15), (17, 17), 2)
         pygame.draw.line(self.ant_img, ANT_COLOR, (8, 18), (5, 22), 2)
         pygame.draw.line(self.ant_img, ANT_COLOR, (12, 18), (15, 22), 2)
+        # Pre-rotated copies, one per ANT_ROTATIONS step of a full turn, shared by all ants
+        self.ant_frames = [pygame.transform.rotate(self.ant_img, i * 360 / ANT_ROTATIONS)
+                           for i in range(ANT_ROTATIONS)]
 
     def setup_ui(self):
         width, height = self.screen.get_size()
@@ -171,7 +242,7 @@ class TSPVisualizer:
         self.slider_cities = pygame_gui.elements.UIHorizontalSlider(
             relative_rect=pygame.Rect(10, y_offset + 25, UI_WIDTH - 20, 20),
             start_value=DEFAULT_NUM_CITIES,
-            value_range=(5, 100),
+            value_range=(5, MAX_CITIES),
             manager=self.manager,
             container=self.panel
         )
@@ -386,59 +457,103 @@ class TSPVisualizer:
             self.label_best_found_at.set_text("Best Found At: -")
 
     def apply_settings(self):
-        # Only apply settings that don't require a full reset if simulation is running
-        # But for simplicity, we might just update the ACO parameters
-        self.aco.num_ants = int(self.slider_ants.get_current_value())
-        self.aco.alpha = self.slider_alpha.get_current_value()
-        self.aco.beta = self.slider_beta.get_current_value()
-        self.aco.evaporation_rate = self.slider_evap.get_current_value()
-        
-        # Changing cities requires reset
+        # Slider values, applied by the solver thread between iterations
+        num_ants = int(self.slider_ants.get_current_value())
+        alpha = self.slider_alpha.get_current_value()
+        beta = self.slider_beta.get_current_value()
+        evaporation_rate = self.slider_evap.get_current_value()
         new_cities = int(self.slider_cities.get_current_value())
-        
-        # Check if grid mode changed implicitly by user action (handled in button event)
-        # Here we just check if we need to reset
-        if new_cities != self.aco.num_cities:
-            self.aco.num_cities = new_cities
-            self.aco.reset()
-            self.visible_best_tour = None
-            self.visible_best_distance = float('inf')
-            self.visible_last_improvement_iter = 0
-            self.visible_iteration = 0
-            self.converged = False
-            self.running_simulation = False
+
+        def apply(aco):
+            aco.num_ants = num_ants
+            aco.alpha = alpha
+            aco.beta = beta
+            aco.evaporation_rate = evaporation_rate
+            # Large instances restrict ants to their nearest cities
+            aco.candidate_k = CANDIDATE_K if new_cities > LOD_CITIES else None
+            # Add or remove cities one at a time; the search keeps its pheromones and best tour
+            while aco.num_cities < new_cities:
+                aco.add_city(aco.random_point())
+            while aco.num_cities > new_cities:
+                aco.remove_city(int(aco.rng.integers(aco.num_cities)))
+        self.solver.submit(apply)
+
+        if new_cities != self.snapshot.num_cities:
+            # Running ants follow the old map
             self.animating = False
             self.ant_sprites.empty()
-            self.distance_history = []
 
-    def toggle_grid(self):
-        self.show_grid = not self.show_grid
-        if self.show_grid:
-            self.aco.grid_spacing = self.grid_spacing
-        else:
-            self.aco.grid_spacing = None
-        self.aco.reset()
-        self.visible_best_tour = None
-        self.visible_best_distance = float('inf')
-        self.visible_last_improvement_iter = 0
-        self.visible_iteration = 0
-        self.converged = False
+    def reset_solver(self, keep_cities=False):
+        # Pause and reset the solver (new cities unless keep_cities), then show the fresh state
         self.running_simulation = False
+        self.solver.pause()
+
+        def reset(aco):
+            if keep_cities:
+                aco.reset_search()
+            else:
+                aco.reset()
+            self.solver.history.clear()
+        self.solver.submit(reset).result()
+        self.show_snapshot(self.solver.latest)
         self.animating = False
         self.ant_sprites.empty()
-        self.distance_history = []
+        if not keep_cities:
+            self.lod_cities = LOD_CITIES
+
+    def show_snapshot(self, snapshot):
+        self.snapshot = snapshot
+        self.visible_best_tour = snapshot.best_tour
+        self.visible_best_distance = snapshot.best_distance
+        self.visible_last_improvement_iter = snapshot.last_improvement_iter
+        self.visible_iteration = snapshot.iteration
+        self.converged = snapshot.stop_reason is not None
+        self.update_ui_labels()
 
-    def draw_grid(self):
+    def toggle_grid(self):
+        self.show_grid = not self.show_grid
+        spacing = self.grid_spacing if self.show_grid else None
+
+        def set_spacing(aco):
+            aco.grid_spacing = spacing
+        self.solver.submit(set_spacing)
+        self.reset_solver()
+
+    def draw_background(self):
+        # Simulation area background and grid, rendered once per window size and grid setting
+        width, height = self.screen.get_size()
+        key = (width, height, self.show_grid, self.grid_spacing)
+        if key != self.background_key:
+            self.background_key = key
+            self.background_layer = pygame.Surface((width - UI_WIDTH, height))
+            self.background_layer.fill(BG_COLOR)
+            self.draw_grid(self.background_layer)
+        self.screen.blit(self.background_layer, (0, 0))
+
+    def draw_grid(self, surface):
         if self.show_grid:
-            width, height = self.screen.get_size()
-            for x in range(0, width - UI_WIDTH, self.grid_spacing):
-                pygame.draw.line(self.screen, GRID_COLOR, (x, 0), (x, height), 1)
+            width, height = surface.get_size()
+            for x in range(0, width, self.grid_spacing):
+                pygame.draw.line(surface, GRID_COLOR, (x, 0), (x, height), 1)
             for y in range(0, height, self.grid_spacing):
-                pygame.draw.line(self.screen, GRID_COLOR, (0, y), (width - UI_WIDTH, y), 1)
+                pygame.draw.line(surface, GRID_COLOR, (0, y), (width, y), 1)
             # Add grid dots at intersections for better visual
-            for x in range(0, width - UI_WIDTH, self.grid_spacing):
+            for x in range(0, width, self.grid_spacing):
                 for y in range(0, height, self.grid_spacing):
-                    pygame.draw.circle(self.screen, (200, 200, 200), (x, y), 2)
+                    pygame.draw.circle(surface, (200, 200, 200), (x, y), 2)
+
+    def render_text(self, text, size, color, bold=False):
+        # Arial text surface, memoized by string, size, color and weight
+        key = (text, size, color, bold)
+        surface = self.text_cache.get(key)
+        if surface is None:
+            font = self.fonts.get((size, bold))
+            if font is None:
+                font = self.fonts[(size, bold)] = pygame.font.SysFont('Arial', size, bold=bold)
+            if len(self.text_cache) >= TEXT_CACHE_SIZE:
+                self.text_cache.clear()
+            surface = self.text_cache[key] = font.render(text, True, color)
+        return surface
 
     def draw_legend(self):
         # Modern Legend Box with shadow effect
@@ -464,10 +579,7 @@ class TSPVisualizer:
         pygame.draw.rect(self.screen, ACCENT_COLOR, legend_rect, 3, border_radius=8)
         
         # Title
-        font_title = pygame.font.SysFont('Arial', 18, bold=True)
-        font_item = pygame.font.SysFont('Arial', 16)
-        
-        title = font_title.render("Legend", True, TEXT_COLOR)
+        title = self.render_text("Legend", 18, TEXT_COLOR, bold=True)
         self.screen.blit(title, (legend_rect.x + 10, legend_rect.y + 8))
         
         # Items
@@ -477,128 +589,151 @@ class TSPVisualizer:
         # City
         city_rect = self.city_img.get_rect(center=(x + 12, y + 10))
         self.screen.blit(self.city_img, city_rect)
-        text = font_item.render("City", True, TEXT_COLOR)
+        text = self.render_text("City", 16, TEXT_COLOR)
         self.screen.blit(text, (x + 35, y - 5))
         y += 28
         
         # Ant
         ant_rect = self.ant_img.get_rect(center=(x + 12, y + 5))
         self.screen.blit(self.ant_img, ant_rect)
-        text = font_item.render("Ant", True, TEXT_COLOR)
+        text = self.render_text("Ant", 16, TEXT_COLOR)
         self.screen.blit(text, (x + 35, y - 5))
         y += 28
         
         # Best Path
         pygame.draw.line(self.screen, BEST_PATH_COLOR, (x, y ), (x + 25, y), 4)
-        text = font_item.render("Best Path", True, TEXT_COLOR)
+        text = self.render_text("Best Path", 16, TEXT_COLOR)
         self.screen.blit(text, (x + 35, y-10))
         y += 28
         
         # Pheromone
         pygame.draw.line(self.screen, PHEROMONE_COLOR, (x, y-5), (x + 25, y-5), 3)
-        text = font_item.render("Pheromone", True, TEXT_COLOR)
+        text = self.render_text("Pheromone", 16, TEXT_COLOR)
         self.screen.blit(text, (x + 35, y - 15))
 
-    def draw_aco(self):
-        self.draw_grid()
-        width, height = self.screen.get_size()
+    def update_layers(self):
+        # Redraw the pheromone and best-path layers if a new snapshot arrived or the window was
+        # resized; otherwise a frame only blits them
+        size = self.screen.get_size()
+        key = (self.snapshot.version, size, self.show_labels, self.lod)
+        if key == self.layers_key:
+            return
+        self.layers_key = key
+        if self.pheromone_layer is None or self.pheromone_layer.get_size() != size:
+            self.pheromone_layer = pygame.Surface(size, pygame.SRCALPHA)
+            self.best_path_layer = pygame.Surface(size, pygame.SRCALPHA)
+        self.pheromone_layer.fill((0, 0, 0, 0))
+        self.best_path_layer.fill((0, 0, 0, 0))
+        snapshot = self.snapshot
+
+        if not self.converged:
+            # Strongest first; fewer of them in level of detail mode
+            rows, cols, strengths = snapshot.pheromone_edges
+            limit = LOD_PHEROMONE_EDGES if self.lod else len(strengths)
+            # Weakest first, so stronger trails are drawn over them
+            order = np.arange(min(limit, len(strengths)))[::-1]
+            starts = snapshot.cities[rows[order]].tolist()
+            ends = snapshot.cities[cols[order]].tolist()
+            # Scale alpha: 0-255 with gradient; thicker lines for stronger pheromones
+            alphas = (180 * strengths[order]).astype(int).tolist()
+            widths = np.maximum(1, (3 * strengths[order]).astype(int)).tolist()
+            for start_pos, end_pos, alpha, width in zip(starts, ends, alphas, widths):
+                color = (PHEROMONE_COLOR[0], PHEROMONE_COLOR[1], PHEROMONE_COLOR[2], alpha)
+                pygame.draw.line(self.pheromone_layer, color, start_pos, end_pos, width)
+
+        if snapshot.best_tour and self.lod:
+            # One polyline, without glow or labels
+            points = snapshot.cities[snapshot.best_tour].tolist()
+            pygame.draw.lines(self.best_path_layer, BEST_PATH_COLOR, True, points, 2)
+        elif snapshot.best_tour:
+            points = snapshot.cities[snapshot.best_tour].tolist()
+            edges = list(zip(points, points[1:] + points[:1]))
+            # Glow (outer layer), then the main path
+            for start_pos, end_pos in edges:
+                pygame.draw.line(self.best_path_layer, (46, 213, 115, 100), start_pos, end_pos, 8)
+            for start_pos, end_pos in edges:
+                pygame.draw.line(self.best_path_layer, BEST_PATH_COLOR, start_pos, end_pos, 4)
+
+            # Edge Distance Labels (only for best path)
+            if self.show_labels:
+                for (start_pos, end_pos), dist in zip(edges, snapshot.best_edge_lengths.tolist()):
+                    # Draw distance label with background at the midpoint
+                    text = self.render_text(f"{int(dist)}", 12, TEXT_COLOR)
+                    text_rect = text.get_rect(center=(int((start_pos[0] + end_pos[0]) / 2),
+                                                      int((start_pos[1] + end_pos[1]) / 2)))
+                    bg_rect = text_rect.inflate(6, 4)
+                    pygame.draw.rect(self.best_path_layer, (255, 255, 255, 200), bg_rect)
+                    pygame.draw.rect(self.best_path_layer, ACCENT_COLOR, bg_rect, 1)
+                    self.best_path_layer.blit(text, text_rect)
+
+    def update_city_layer(self):
+        # City markers and labels, redrawn only when the cities, the labels or the window size change
+        snapshot = self.snapshot
+        size = self.screen.get_size()
+        show_labels = self.show_labels and not self.lod
+        start = snapshot.best_tour[0] if show_labels and snapshot.best_tour else None
+        key = (size, show_labels, self.lod, start, snapshot.cities.tobytes())
+        if key == self.city_key:
+            return
+        self.city_key = key
+        if self.city_layer is None or self.city_layer.get_size() != size:
+            self.city_layer = pygame.Surface(size, pygame.SRCALPHA)
+        self.city_layer.fill((0, 0, 0, 0))
+
+        if self.lod:
+            # Dots instead of markers
+            for city in snapshot.cities.astype(int).tolist():
+                pygame.draw.circle(self.city_layer, CITY_OUTLINE, city, 2)
+            return
 
-        # Draw Pheromones
-        # Create a surface for pheromones to handle alpha blending efficiently
-        pheromone_surface = pygame.Surface((width, height), pygame.SRCALPHA)
-        
-        max_pheromone = np.max(self.aco.pheromones)
-        if max_pheromone > 0 and not self.converged:
-            for i in range(self.aco.num_cities):
-                for j in range(i + 1, self.aco.num_cities):
-                    strength = self.aco.pheromones[i][j] / max_pheromone
-                    if strength > 0.05: # Threshold to avoid drawing everything
-                        # Scale alpha: 0-255 with gradient
-                        alpha = int(180 * strength)
-                        # Color: Blue gradient
-                        color = (PHEROMONE_COLOR[0], PHEROMONE_COLOR[1], PHEROMONE_COLOR[2], alpha)
-                        start_pos = self.aco.cities[i]
-                        end_pos = self.aco.cities[j]
-                        
-                        # Draw thicker lines for stronger pheromones
-                        width = max(1, int(3 * strength))
-                        pygame.draw.line(pheromone_surface, color, start_pos, end_pos, width)
-        
-        self.screen.blit(pheromone_surface, (0,0))
-
-        # Draw Best Path with glow effect
-        if self.visible_best_tour:
-            tour = self.visible_best_tour
-            # Draw glow (outer layer)
-            for i in range(len(tour)):
-                start_pos = self.aco.cities[tour[i]]
-                end_pos = self.aco.cities[tour[(i + 1) % len(tour)]]
-                # Glow effect
-                glow_surface = pygame.Surface((width, height), pygame.SRCALPHA)
-                pygame.draw.line(glow_surface, (46, 213, 115, 100), start_pos, end_pos, 8)
-                self.screen.blit(glow_surface, (0, 0))
-            # Draw main path
-            for i in range(len(tour)):
-                start_pos = self.aco.cities[tour[i]]
-                end_pos = self.aco.cities[tour[(i + 1) % len(tour)]]
-                pygame.draw.line(self.screen, BEST_PATH_COLOR, start_pos, end_pos, 4)
-
-        # Draw Edge Distance Labels (only for best path)
-        if self.visible_best_tour and self.show_labels:
-            tour = self.visible_best_tour
-            font = pygame.font.SysFont('Arial', 12)
-            for i in range(len(tour)):
-                from_city_idx = tour[i]
-                to_city_idx = tour[(i + 1) % len(tour)]
-                start_pos = self.aco.cities[from_city_idx]
-                end_pos = self.aco.cities[to_city_idx]
-                
-                # Calculate midpoint
-                mid_x = (start_pos[0] + end_pos[0]) / 2
-                mid_y = (start_pos[1] + end_pos[1]) / 2
-                
-                # Calculate distance
-                dist = self.aco.distances[from_city_idx][to_city_idx]
-                
-                # Draw distance label with background
-                text = font.render(f"{int(dist)}", True, TEXT_COLOR)
-                text_rect = text.get_rect(center=(int(mid_x), int(mid_y)))
-                
-                # Background rectangle
-                bg_rect = text_rect.inflate(6, 4)
-                bg_surface = pygame.Surface((bg_rect.width, bg_rect.height))
-                bg_surface.set_alpha(200)
-                bg_surface.fill(WHITE)
-                self.screen.blit(bg_surface, bg_rect.topleft)
-                pygame.draw.rect(self.screen, ACCENT_COLOR, bg_rect, 1)
-                
-                self.screen.blit(text, text_rect)
-        
-        # Draw Cities
-        for idx, city in enumerate(self.aco.cities):
+        for idx, city in enumerate(snapshot.cities.tolist()):
             # Draw City Icon
             rect = self.city_img.get_rect(center=(int(city[0]), int(city[1])))
-            self.screen.blit(self.city_img, rect)
+            self.city_layer.blit(self.city_img, rect)
             
-            if self.show_labels:
-                font = pygame.font.SysFont('Arial', 16, bold=True)
+            if show_labels:
                 text_str = str(idx)
                 
                 # Check for start/end if best tour exists
-                if self.visible_best_tour and idx == self.visible_best_tour[0]:
+                if idx == start:
                      text_str += " (Start/End)"
                 
-                text = font.render(text_str, True, WHITE)
+                text = self.render_text(text_str, 16, WHITE, bold=True)
                 
                 # Position text
                 text_rect = text.get_rect(midleft=(rect.right + 5, rect.centery))
                 
                 # Background for readability (pill shape or rect)
                 bg_rect = text_rect.inflate(10, 6)
-                pygame.draw.rect(self.screen, CITY_OUTLINE, bg_rect, border_radius=10)
-                pygame.draw.rect(self.screen, CITY_COLOR, bg_rect.inflate(-2, -2), border_radius=9)
+                pygame.draw.rect(self.city_layer, CITY_OUTLINE, bg_rect, border_radius=10)
+                pygame.draw.rect(self.city_layer, CITY_COLOR, bg_rect.inflate(-2, -2), border_radius=9)
                 
-                self.screen.blit(text, text_rect)
+                self.city_layer.blit(text, text_rect)
+
+    def update_lod(self):
+        # Level of detail mode above lod_cities cities: fewer pheromone edges, no labels, dots for
+        # cities, a plain best tour and a sample of ants. A slow frame lowers lod_cities to the
+        # current count, so the mode also holds for this instance size afterwards.
+        num_cities = self.snapshot.num_cities
+        if not self.lod and self.frame_time > LOD_FRAME_TIME:
+            self.lod_cities = min(self.lod_cities, num_cities - 1)
+        lod = num_cities > self.lod_cities
+        if lod != self.lod:
+            self.lod = lod
+            self.animating = False
+            self.ant_sprites.empty()
+
+    def draw_aco(self):
+        self.draw_background()
+
+        # Draw Pheromones and the Best Path with glow effect
+        self.update_layers()
+        self.screen.blit(self.pheromone_layer, (0, 0))
+        self.screen.blit(self.best_path_layer, (0, 0))
+
+        # Draw Cities
+        self.update_city_layer()
+        self.screen.blit(self.city_layer, (0, 0))
 
         # Draw Ants
         self.ant_sprites.draw(self.screen)
@@ -627,11 +762,6 @@ class TSPVisualizer:
             self.screen.blit(panel_surface, (panel_x, panel_y))
             pygame.draw.rect(self.screen, ACCENT_COLOR, (panel_x, panel_y, panel_width, panel_height), 3, border_radius=10)
             
-            # Fonts
-            font_title = pygame.font.SysFont('Arial', 16, bold=True)
-            font_value = pygame.font.SysFont('Arial', 24, bold=True)
-            font_label = pygame.font.SysFont('Arial', 14)
-            
             x_pos = panel_x + 15
             y_pos = panel_y + 15
             
@@ -642,40 +772,83 @@ class TSPVisualizer:
                 dist_str = f"{int(round(self.visible_best_distance))}"
                 color = BEST_PATH_COLOR
             
-            label = font_label.render("Best Distance:", True, TEXT_COLOR)
+            label = self.render_text("Best Distance:", 14, TEXT_COLOR)
             self.screen.blit(label, (x_pos, y_pos))
-            value = font_value.render(dist_str, True, color)
+            value = self.render_text(dist_str, 24, color, bold=True)
             self.screen.blit(value, (x_pos, y_pos + 18))
             
             # Current Iteration
             x_pos = panel_x + 180
-            label = font_label.render("Current Iteration:", True, TEXT_COLOR)
+            label = self.render_text("Current Iteration:", 14, TEXT_COLOR)
             self.screen.blit(label, (x_pos, y_pos))
-            value = font_value.render(f"{self.visible_iteration}", True, PHEROMONE_COLOR)
+            value = self.render_text(f"{self.visible_iteration}", 24, PHEROMONE_COLOR, bold=True)
             self.screen.blit(value, (x_pos, y_pos + 18))
             
             # Best Found At
             x_pos = panel_x + 15
             y_pos += 60
             found_at = (self.visible_last_improvement_iter) if self.visible_best_distance != float('inf') else "-"
-            label = font_label.render("Best Found at Iteration:", True, TEXT_COLOR)
+            label = self.render_text("Best Found at Iteration:", 14, TEXT_COLOR)
             self.screen.blit(label, (x_pos, y_pos))
-            value = font_value.render(str(found_at), True, ACCENT_COLOR)
+            value = self.render_text(str(found_at), 24, ACCENT_COLOR, bold=True)
             self.screen.blit(value, (x_pos, y_pos + 18))
             
             # Convergence Status
             if self.converged:
                 x_pos = panel_x + 180
-                label = font_label.render("Status:", True, TEXT_COLOR)
+                label = self.render_text("Status:", 14, TEXT_COLOR)
                 self.screen.blit(label, (x_pos, y_pos))
-                value = font_value.render("CONVERGED", True, RED)
+                status = "ERROR" if self.snapshot.stop_reason == 'error' else "CONVERGED"
+                value = self.render_text(status, 24, RED, bold=True)
                 self.screen.blit(value, (x_pos, y_pos + 18))
 
+            if self.show_profile:
+                self.draw_profile(panel_x, panel_y + panel_height + 15)
+
+    def toggle_profiling(self):
+        self.show_profile = not self.show_profile
+        if self.show_profile:
+            self.solver.submit(lambda aco: aco.enable_profiling().reset())
+        else:
+            self.solver.submit(lambda aco: aco.disable_profiling())
+
+    def draw_profile(self, panel_x, panel_y):
+        # Mean time per call of each ACO phase, from the solver's profiling snapshot
+        snapshot = self.snapshot.profile
+        if snapshot is None:
+            return
+        lines = [f"{name.replace('_', ' ').title()}: {phase['mean_seconds'] * 1000:.2f} ms"
+                 for name, phase in snapshot['phases'].items()]
+        counters = snapshot['counters']
+        lines.append(f"Ant Steps: {counters['ant_steps']}")
+        lines.append(f"Fallbacks: {counters['uniform_fallbacks'] + counters['nearest_fallbacks']}")
+
+        panel_width = 340
+        panel_height = 40 + 18 * len(lines)
+
+        shadow = pygame.Surface((panel_width + 4, panel_height + 4))
+        shadow.set_alpha(40)
+        shadow.fill(BLACK)
+        self.screen.blit(shadow, (panel_x + 4, panel_y + 4))
+
+        panel_surface = pygame.Surface((panel_width, panel_height))
+        panel_surface.set_alpha(230)
+        panel_surface.fill(WHITE)
+        self.screen.blit(panel_surface, (panel_x, panel_y))
+        pygame.draw.rect(self.screen, ACCENT_COLOR, (panel_x, panel_y, panel_width, panel_height), 3, border_radius=10)
+
+        title = self.render_text("Profile (per call)", 16, TEXT_COLOR, bold=True)
+        self.screen.blit(title, (panel_x + 15, panel_y + 10))
+        for i, line in enumerate(lines):
+            text = self.render_text(line, 14, TEXT_COLOR)
+            self.screen.blit(text, (panel_x + 15, panel_y + 32 + 18 * i))
+
     def show_chart(self):
-        if not self.distance_history:
+        distance_history = list(self.solver.history)
+        if not distance_history:
             return
         # Convert recorded distances to nearest integers for display
-        integer_dist = [int(round(d)) for d in self.distance_history]
+        integer_dist = [int(round(d)) for d in distance_history]
 
         plt.figure(figsize=(10, 6))
         plt.plot(integer_dist, linewidth=2, color='blue', label='Best Distance (int)')
@@ -686,7 +859,7 @@ class TSPVisualizer:
                      textcoords="offset points", xytext=(10,10), ha='center')
         
         # Mark the end
-        end_idx = len(self.distance_history) - 1
+        end_idx = len(distance_history) - 1
         plt.scatter(end_idx, integer_dist[-1], color='red', zorder=5, label='Current/End')
         plt.annotate(f'{integer_dist[-1]}', (end_idx, integer_dist[-1]), 
                      textcoords="offset points", xytext=(10,-15), ha='center')
@@ -705,26 +878,9 @@ class TSPVisualizer:
 
     def start_animation(self, tours):
         self.animating = True
-        self.ant_sprites.empty()
-        
         speed = self.slider_speed.get_current_value()
-        
-        # Create ant sprites for each tour
-        for tour in tours:
-            start_city_idx = tour[0]
-            start_pos = self.aco.cities[start_city_idx]
-            
-            ant = AntSprite(self.ant_img, start_pos, speed)
-            
-            # Build path coordinates
-            path_coords = []
-            for city_idx in tour:
-                path_coords.append(self.aco.cities[city_idx])
-            # Add return to start
-            path_coords.append(self.aco.cities[tour[0]])
-            
-            ant.set_path(path_coords)
-            self.ant_sprites.add(ant)
+        # One ant sprite per tour, walking it back to its start
+        self.ant_sprites.start(tours, self.snapshot.cities, self.ant_frames, speed)
 
     def run(self):
         running = True
@@ -738,38 +894,27 @@ class TSPVisualizer:
                 if event.type == pygame.VIDEORESIZE:
                     self.handle_resize(event.w, event.h)
 
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_p:
+                    self.toggle_profiling()
+
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_a:
+                    self.animate_ants = not self.animate_ants
+                    self.animating = False
+                    self.ant_sprites.empty()
+
                 if event.type == pygame_gui.UI_BUTTON_PRESSED:
                     if event.ui_element == self.btn_start:
                         self.running_simulation = not self.running_simulation
-                        if not self.running_simulation:
+                        if self.running_simulation:
+                            self.solver.resume()
+                        else:
+                            self.solver.pause()
                             self.animating = False # Stop animation if paused
                     elif event.ui_element == self.btn_reset:
                         self.apply_settings() # Apply all settings including num cities
-                        self.aco.reset()
-                        self.visible_best_tour = None
-                        self.visible_best_distance = float('inf')
-                        self.visible_last_improvement_iter = 0
-                        self.visible_iteration = 0
-                        self.converged = False
-                        self.running_simulation = False
-                        self.animating = False
-                        self.ant_sprites.empty()
-                        self.distance_history = []
+                        self.reset_solver()
                     elif event.ui_element == self.btn_reset_pheromones:
-                        self.aco.pheromones = np.ones((self.aco.num_cities, self.aco.num_cities)) * 0.1
-                        self.aco.iteration = 0
-                        self.aco.best_tour = None
-                        self.aco.best_distance = float('inf')
-                        self.aco.last_improvement_iter = 0
-                        self.visible_best_tour = None
-                        self.visible_best_distance = float('inf')
-                        self.visible_last_improvement_iter = 0
-                        self.visible_iteration = 0
-                        self.converged = False
-                        self.running_simulation = False
-                        self.animating = False
-                        self.ant_sprites.empty()
-                        self.distance_history = []
+                        self.reset_solver(keep_cities=True)
                     elif event.ui_element == self.chk_labels:
                         self.show_labels = not self.show_labels
                     elif event.ui_element == self.btn_toggle_overlays:
@@ -781,72 +926,47 @@ class TSPVisualizer:
                 # Update settings in real-time if possible, or on release
                 if event.type == pygame_gui.UI_HORIZONTAL_SLIDER_MOVED:
                     self.update_ui_labels()
-                    # We can update some params live
-                    self.aco.num_ants = int(self.slider_ants.get_current_value())
-                    self.aco.alpha = self.slider_alpha.get_current_value()
-                    self.aco.beta = self.slider_beta.get_current_value()
-                    self.aco.evaporation_rate = self.slider_evap.get_current_value()
+                    # Every parameter, including the number of cities, applies live
+                    self.apply_settings()
                     # Update speed for all current ants immediately
-                    new_speed = self.slider_speed.get_current_value()
-                    for ant in self.ant_sprites:
-                        ant.speed = new_speed
+                    self.ant_sprites.set_speed(self.slider_speed.get_current_value())
 
                 self.manager.process_events(event)
 
             self.manager.update(time_delta)
             
-            if self.running_simulation:
-                if not self.animating:
-                    # Check for convergence
-                    if self.aco.iteration > 0 and (self.aco.iteration - self.aco.last_improvement_iter > ITERATION_CUTOFF):
-                        self.converged = True
-                        tours, distances = self.aco.run_best_path_demo()
-                    else:
-                        # Run one iteration logic
-                        tours, distances = self.aco.run_iteration()
-                    
-                    if self.aco.best_distance != float('inf'):
-                        self.distance_history.append(self.aco.best_distance)
+            # Show the solver's latest state; it iterates on its own thread
+            snapshot = self.solver.latest
+            if snapshot is not self.snapshot:
+                self.show_snapshot(snapshot)
 
-                    self.update_ui_labels()
-                    # Start animation
-                    self.start_animation(tours)
+            self.update_lod()
+
+            if self.running_simulation and self.animate_ants:
+                if not self.animating:
+                    # Animate the most recent tours; once converged the ants replay the best tour
+                    num_ants = min(self.snapshot.num_ants, LOD_ANTS) if self.lod else self.snapshot.num_ants
+                    if self.converged and self.snapshot.best_tour:
+                        self.start_animation([self.snapshot.best_tour] * num_ants)
+                    elif self.snapshot.tours:
+                        self.start_animation(self.snapshot.tours[:num_ants])
                 else:
                     # Update animation
                     self.ant_sprites.update()
                     # Check if all ants finished
-                    all_finished = True
-                    for ant in self.ant_sprites:
-                        if not ant.finished:
-                            all_finished = False
-                            break
-                    
-                    if all_finished:
+                    if self.ant_sprites.finished:
                         self.animating = False
-                        # Update visible bests only after animation finishes
-                        self.visible_best_tour = self.aco.best_tour
-                        self.visible_best_distance = self.aco.best_distance
-                        self.visible_last_improvement_iter = self.aco.last_improvement_iter
-                        self.visible_iteration = self.aco.iteration
-                        self.update_ui_labels()
-                        
-                        # Pheromones are already updated in run_iteration, 
-                        # but visually we might want to update them here if we were deferring it.
-                        # For now, they update instantly at start of iteration, which is fine.
 
             self.screen.fill(WHITE)
             
-            # Draw simulation area with gradient background
-            width, height = self.screen.get_size()
-            sim_surface = pygame.Surface((width - UI_WIDTH, height))
-            sim_surface.fill(BG_COLOR)
-            self.screen.blit(sim_surface, (0, 0))
-            
+            started = time.perf_counter()
             self.draw_aco()
+            self.frame_time += 0.1 * (time.perf_counter() - started - self.frame_time)
             self.manager.draw_ui(self.screen)
             
             pygame.display.flip()
 
+        self.solver.close()
         pygame.quit()
 
 if __name__ == "__main__":
@@ -0,0 +1,298 @@
+import copy
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+import kernels
+from aco import ACO, ant_draws, construct_tours, tour_lengths
+
+# Multi-process runners. Large read-only arrays live in shared memory and are attached by the
+# workers once, instead of being pickled into every task.
+
+
+class SharedArray:
+    # A NumPy array backed by a named shared memory block, created by the parent process
+    def __init__(self, shape, dtype):
+        dtype = np.dtype(dtype)
+        size = max(1, int(np.prod(shape)) * dtype.itemsize)
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.array = np.ndarray(shape, dtype=dtype, buffer=self.shm.buf)
+        # (name, shape, dtype) is all a worker needs to attach
+        self.spec = (self.shm.name, tuple(shape), dtype.str)
+
+    @classmethod
+    def copy_of(cls, array):
+        shared = cls(array.shape, array.dtype)
+        shared.array[...] = array
+        return shared
+
+    def close(self):
+        self.array = None
+        self.shm.close()
+        self.shm.unlink()
+
+
+def attach(spec):
+    # Worker side: (shared memory handle, array view) for a SharedArray.spec
+    name, shape, dtype = spec
+    try:
+        shm = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 registers every attach with the resource tracker, which would then unlink
+        # (or complain about) a block the parent owns; skip the registration
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args: None
+        try:
+            shm = shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+    return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def solver_options(aco):
+    # ACO constructor arguments, other than the instance data, that reproduce aco's configuration
+    return dict(
+        num_ants=aco.num_ants,
+        alpha=aco.alpha,
+        beta=aco.beta,
+        evaporation_rate=aco.evaporation_rate,
+        q=aco.q,
+        vectorized=aco.vectorized,
+        candidate_k=aco.candidate_k,
+        distance_dtype=aco.distance_dtype,
+        local_search=aco.local_search,
+        local_search_ants=aco.local_search_ants,
+        strategy=aco.strategy,
+        backend=aco.backend,
+    )
+
+
+def _build_colony(options, cities, distances, neighbours, pheromones):
+    # A solver over the shared instance whose pheromone matrix is the given shared view
+    aco = ACO(len(distances), options['num_ants'], options['alpha'], options['beta'],
+              options['evaporation_rate'], options['q'], 0, 0,
+              vectorized=options['vectorized'], candidate_k=options['candidate_k'],
+              distance_dtype=options['distance_dtype'], cities=cities, distances=distances,
+              neighbours=neighbours, local_search=options['local_search'],
+              local_search_ants=options['local_search_ants'], strategy=copy.copy(options['strategy']),
+              backend=options['backend'])
+    aco.pheromones = pheromones
+    return aco
+
+
+# --- Island model -------------------------------------------------------------------------
+
+# Per worker process: shared views and the colonies this worker has already built
+_island = {}
+
+
+def _init_island_worker(distance_spec, pheromone_spec, cities, neighbours, options):
+    _island['handles'] = []
+    for key, spec in (('distances', distance_spec), ('pheromones', pheromone_spec)):
+        shm, array = attach(spec)
+        _island['handles'].append(shm)
+        _island[key] = array
+    _island['cities'] = cities
+    _island['neighbours'] = neighbours
+    _island['options'] = options
+    _island['colonies'] = {}
+
+
+def _run_island(colony, state, iterations, seed):
+    colonies = _island['colonies']
+    if colony not in colonies:
+        colonies[colony] = _build_colony(_island['options'], _island['cities'], _island['distances'],
+                                         _island['neighbours'], _island['pheromones'][colony])
+    aco = colonies[colony]
+    # Any worker may run any colony: all search state comes from the parent, pheromones from shared memory
+    aco.best_tour = state['best_tour']
+    aco.best_distance = state['best_distance']
+    aco.iteration = state['iteration']
+    aco.last_improvement_iter = state['last_improvement_iter']
+    aco.refresh_choice_info()
+    if seed is not None:
+        aco.rng = np.random.default_rng(seed)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        aco.run_iteration()
+    return {
+        'best_tour': aco.best_tour,
+        'best_distance': aco.best_distance,
+        'iteration': aco.iteration,
+        'last_improvement_iter': aco.last_improvement_iter,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+class IslandModel:
+    # Runs num_colonies independent copies of a configured ACO in worker processes. Every
+    # migration_interval iterations the best tour found by any colony is deposited into every
+    # colony's pheromones, weighted by migration_weight.
+    def __init__(self, aco, num_colonies=4, migration_interval=10, migration_weight=1.0, max_workers=None, seed=None):
+        if aco.pheromone_storage != 'dense':
+            raise ValueError("the island model needs dense pheromone storage")
+        if aco.lazy_distances:
+            raise ValueError("the island model shares a materialized distance matrix; disable lazy_distances")
+        self.template = aco
+        self.num_colonies = num_colonies
+        self.migration_interval = migration_interval
+        self.migration_weight = migration_weight
+        self.max_workers = max_workers or num_colonies
+        self.seed = seed
+
+        self.best_tour = None
+        self.best_distance = float('inf')
+        self.best_colony = None
+        self.last_improvement_iter = 0
+        self.iteration = 0
+        self.history = []
+
+    def run(self, max_iterations=None, time_limit=None, cutoff=None):
+        # Iterations count per colony. Returns a result dict with the stop reason and throughput.
+        aco = self.template
+        distances = SharedArray.copy_of(np.asarray(aco.distances))
+        pheromones = SharedArray((self.num_colonies,) + aco.pheromones.shape, aco.pheromones.dtype)
+        pheromones.array[...] = aco.pheromones
+        states = [{'best_tour': None, 'best_distance': float('inf'), 'iteration': 0, 'last_improvement_iter': 0}
+                  for _ in range(self.num_colonies)]
+
+        start = time.perf_counter()
+        worker_seconds = 0.0
+        epoch = 0
+        try:
+            with ProcessPoolExecutor(self.max_workers, initializer=_init_island_worker,
+                                     initargs=(distances.spec, pheromones.spec, aco.cities, aco.candidate_lists(),
+                                               solver_options(aco))) as pool:
+                while True:
+                    reason = self._stop_reason(max_iterations, time_limit, cutoff, start)
+                    if reason:
+                        break
+                    iterations = self.migration_interval
+                    if max_iterations is not None:
+                        iterations = min(iterations, max_iterations - self.iteration)
+
+                    futures = [pool.submit(_run_island, colony, states[colony], iterations, self._task_seed(colony, epoch))
+                               for colony in range(self.num_colonies)]
+                    states = [future.result() for future in futures]
+                    worker_seconds += sum(state.pop('seconds') for state in states)
+                    self.iteration += iterations
+                    epoch += 1
+
+                    colony = min(range(self.num_colonies), key=lambda c: states[c]['best_distance'])
+                    if states[colony]['best_distance'] < self.best_distance:
+                        self.best_distance = states[colony]['best_distance']
+                        self.best_tour = states[colony]['best_tour']
+                        self.best_colony = colony
+                        self.last_improvement_iter = self.iteration
+                    self.history.append(self.best_distance)
+                    self._migrate(pheromones.array)
+        finally:
+            distances.close()
+            pheromones.close()
+
+        elapsed = time.perf_counter() - start
+        total_iterations = self.iteration * self.num_colonies
+        return {
+            'stop_reason': reason,
+            'colonies': self.num_colonies,
+            'iterations': self.iteration,
+            'total_iterations': total_iterations,
+            'best_distance': self.best_distance if self.best_tour is not None else None,
+            'best_tour': self.best_tour,
+            'best_colony': self.best_colony,
+            'best_found_at': self.last_improvement_iter,
+            'colony_best_distances': [state['best_distance'] for state in states],
+            'elapsed_seconds': elapsed,
+            'iterations_per_second': total_iterations / elapsed if elapsed > 0 else None,
+            'worker_seconds': worker_seconds,
+            'history': self.history,
+        }
+
+    def _stop_reason(self, max_iterations, time_limit, cutoff, start):
+        if max_iterations is not None and self.iteration >= max_iterations:
+            return 'max_iterations'
+        if time_limit is not None and time.perf_counter() - start >= time_limit:
+            return 'time_limit'
+        if cutoff is not None and self.iteration > 0 and self.iteration - self.last_improvement_iter > cutoff:
+            return 'converged'
+        return None
+
+    def _task_seed(self, colony, epoch):
+        if self.seed is None:
+            return None
+        return (self.seed * 1000003 + epoch * self.num_colonies + colony) % 2 ** 32
+
+    def _migrate(self, pheromones):
+        # Deposit the global best tour into every colony, both directions of each edge
+        if self.best_tour is None or self.migration_weight <= 0:
+            return
+        tour = np.asarray(self.best_tour)
+        following = np.roll(tour, -1)
+        deposit = self.migration_weight * self.template.q / self.best_distance
+        pheromones[:, tour, following] += deposit
+        pheromones[:, following, tour] += deposit
+
+
+# --- Parallel construction within one colony ---------------------------------------------
+
+# Per worker process: shared views of the parent's choice-info and distance matrices
+_construction = {}
+
+
+def _init_construction_worker(choice_spec, distance_spec, candidates, compiled):
+    _construction['handles'] = []
+    for key, spec in (('choice_info', choice_spec), ('distances', distance_spec)):
+        shm, array = attach(spec)
+        _construction['handles'].append(shm)
+        _construction[key] = array
+    _construction['candidates'] = candidates
+    _construction['compiled'] = compiled
+
+
+def _construct_ants(seeds):
+    distances = _construction['distances']
+    choice_info = _construction['choice_info']
+    starts, uniforms, _ = ant_draws(seeds, len(choice_info))
+    if _construction['compiled']:
+        tours = kernels.construct_tours(choice_info, _construction['candidates'], distances, starts, uniforms)
+        return tours, kernels.tour_lengths(distances, tours)
+    tours = construct_tours(choice_info, _construction['candidates'], distances, starts, uniforms)
+    return tours.astype(np.int32), tour_lengths(distances, tours)
+
+
+class ParallelConstruction:
+    # Builds one colony's tours across worker processes (ACO(..., workers=N)). Workers read the
+    # tau^alpha * eta^beta choice-info matrix and the distances from shared memory, every ant uses
+    # the seed the parent's rng gave it (so the tours match a single-process run), and only int32
+    # tours and their lengths come back.
+    # The pheromone update stays in the parent, which refreshes the shared choice info afterwards.
+    def __init__(self, aco, workers):
+        if aco.lazy_distances:
+            raise ValueError("parallel construction shares a materialized distance matrix; disable lazy_distances")
+        self.workers = workers
+        self.distances = SharedArray.copy_of(np.asarray(aco.distances))
+        choice_info = aco.choice_info_matrix()
+        self.choice_info = SharedArray(choice_info.shape, choice_info.dtype)
+        self.pool = ProcessPoolExecutor(workers, initializer=_init_construction_worker,
+                                        initargs=(self.choice_info.spec, self.distances.spec, aco.candidate_lists(),
+                                                  aco.compiled_construction()))
+
+    def matches(self, aco):
+        # False once the parent's choice-info layout no longer fits the shared buffer
+        return aco.choice_info_matrix().shape == self.choice_info.array.shape
+
+    def construct(self, aco):
+        # (num_ants, n) int32 tours and their lengths; ants are split evenly across the workers
+        self.choice_info.array[...] = aco.choice_info_matrix()
+        chunks = [chunk for chunk in np.array_split(aco.ant_seeds(), self.workers) if len(chunk)]
+        futures = [self.pool.submit(_construct_ants, chunk) for chunk in chunks]
+        results = [future.result() for future in futures]
+        return np.concatenate([tours for tours, _ in results]), np.concatenate([lengths for _, lengths in results])
+
+    def close(self):
+        self.pool.shutdown()
+        self.choice_info.close()
+        self.distances.close()
@@ -0,0 +1,91 @@
+import bisect
+import time
+
+# Optional instrumentation for ACO: ACO(..., profile=True) or aco.enable_profiling().
+# Instrumented code only tests `self.profiler is not None` while profiling is off.
+#
+# Phases (seconds per call):
+#   iteration         one run_iteration
+#   construction      building every ant's tour for an iteration (including evaluation)
+#   probabilities     one calculate_probabilities call (serial mode)
+#   sampling          one select_next_city call (serial mode)
+#   evaluation        tour lengths: one tour (serial) or the whole colony (vectorized)
+#   local_search      the local search stage of an iteration
+#   pheromone_update  one update_pheromones call
+# Counters:
+#   iterations, ant_steps, candidate_slots (ant_steps times the slots a step weighs: k with
+#   candidate lists, else n; derived, not measured, and a nearest-city fallback scans more),
+#   uniform_fallbacks (no city had any weight), nearest_fallbacks (every candidate was visited)
+
+PHASES = ('iteration', 'construction', 'probabilities', 'sampling', 'evaluation', 'local_search', 'pheromone_update')
+COUNTERS = ('iterations', 'ant_steps', 'candidate_slots', 'uniform_fallbacks', 'nearest_fallbacks')
+
+# Histogram bucket upper edges in seconds, 1 us to 100 s with four buckets per decade
+BUCKETS = [10 ** (exponent / 4) for exponent in range(-24, 9)]
+
+
+class PhaseTimer:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        # counts[i] = calls that took at most BUCKETS[i] (and more than BUCKETS[i - 1]); last = longer
+        self.counts = [0] * (len(BUCKETS) + 1)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def percentile(self, q):
+        # Upper edge of the bucket holding the q-quantile (an upper bound, exact to a quarter decade)
+        rank = q * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return BUCKETS[bucket] if bucket < len(BUCKETS) else self.max
+        return self.max
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'total_seconds': self.total,
+            'mean_seconds': self.total / self.count if self.count else None,
+            'min_seconds': self.min if self.count else None,
+            'max_seconds': self.max if self.count else None,
+            'p50_seconds': self.percentile(0.5) if self.count else None,
+            'p95_seconds': self.percentile(0.95) if self.count else None,
+            # Non-empty buckets only, as [upper edge in seconds (None = above the last edge), count]
+            'histogram': [[BUCKETS[bucket] if bucket < len(BUCKETS) else None, count]
+                          for bucket, count in enumerate(self.counts) if count],
+        }
+
+
+class Profiler:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started = time.perf_counter()
+        self.phases = {name: PhaseTimer() for name in PHASES}
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def add(self, phase, seconds):
+        self.phases[phase].add(seconds)
+
+    def count(self, counter, amount=1):
+        self.counters[counter] += amount
+
+    def snapshot(self):
+        # Plain dict (JSON serializable) of everything recorded since the last reset
+        return {
+            'wall_seconds': time.perf_counter() - self.started,
+            'phases': {name: timer.snapshot() for name, timer in self.phases.items() if timer.count},
+            'counters': dict(self.counters),
+        }
@@ -0,0 +1,93 @@
+import time
+from collections import deque
+
+import numpy as np
+
+# Stopping rules for ACO.run(): ACO(..., stopping=StoppingCriteria(...)) or aco.run(StoppingCriteria(...)).
+# check() runs before every iteration and returns the reason of the first rule that fires:
+#   max_iterations  iteration count reached (counted from iteration 0, so it includes resumed ones)
+#   time_limit      wall-clock seconds since start()
+#   target          best distance at or below a target length
+#   converged       more than cutoff iterations without improvement (the visualizer's rule)
+#   stalled         best distance improved by less than min_improvement (relative) over window iterations
+#   branching       mean lambda-branching factor of the trails below min_branching
+#   entropy         mean normalized entropy of the trails below min_entropy
+# The trail measures cost O(n^2) (O(nk) with candidate lists), so they are only computed every
+# check_every iterations.
+
+
+class StoppingCriteria:
+    def __init__(self, max_iterations=None, time_limit=None, target=None, cutoff=None, window=None,
+                 min_improvement=0.001, min_branching=None, branching_lambda=0.05, min_entropy=None, check_every=10):
+        self.max_iterations = max_iterations
+        self.time_limit = time_limit
+        self.target = target
+        self.cutoff = cutoff
+        self.window = window
+        self.min_improvement = min_improvement
+        self.min_branching = min_branching
+        self.branching_lambda = branching_lambda
+        self.min_entropy = min_entropy
+        self.check_every = check_every
+        self.started = None
+        self._best = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        # Best distance before each of the last window iterations
+        self._best = deque(maxlen=self.window + 1) if self.window else None
+
+    def check(self, aco):
+        # Reason to stop before the next iteration, or None
+        if self.started is None:
+            self.start()
+        if self.max_iterations is not None and aco.iteration >= self.max_iterations:
+            return 'max_iterations'
+        if self.time_limit is not None and time.perf_counter() - self.started >= self.time_limit:
+            return 'time_limit'
+        if self.target is not None and aco.best_distance <= self.target:
+            return 'target'
+        if self.cutoff is not None and aco.iteration > 0 and aco.iteration - aco.last_improvement_iter > self.cutoff:
+            return 'converged'
+        if self._best is not None:
+            self._best.append(aco.best_distance)
+            before = self._best[0]
+            if len(self._best) == self._best.maxlen and np.isfinite(before) and \
+                    before - aco.best_distance < self.min_improvement * before:
+                return 'stalled'
+        if aco.iteration > 0 and aco.iteration % self.check_every == 0:
+            if self.min_branching is not None and branching_factor(aco, self.branching_lambda) < self.min_branching:
+                return 'branching'
+            if self.min_entropy is not None and trail_entropy(aco) < self.min_entropy:
+                return 'entropy'
+        return None
+
+
+def branching_factor(aco, lam=0.05):
+    # Mean over cities of the number of edges whose trail is within the top (1 - lam) of the
+    # city's range [min, max]. It falls towards 2 as every city's trail concentrates on its two tour edges.
+    trails = _trail_rows(aco)
+    low = trails.min(axis=1, keepdims=True)
+    high = trails.max(axis=1, keepdims=True)
+    return float((trails >= low + lam * (high - low)).sum(axis=1).mean())
+
+
+def trail_entropy(aco):
+    # Mean over cities of the entropy of the city's trails as a distribution, divided by its
+    # maximum: 1 for uniform trails, towards 0 as they concentrate on a few edges
+    trails = _trail_rows(aco)
+    p = trails / trails.sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        entropy = -np.where(p > 0, p * np.log(p), 0.0).sum(axis=1)
+    return float(entropy.mean() / np.log(trails.shape[1]))
+
+
+def _trail_rows(aco):
+    # (n, m) trails on the edges ants choose from: the candidate edges, or every other city
+    candidates = aco.candidate_lists()
+    if aco.pheromone_storage == 'sparse':
+        return aco.pheromones.candidate_values()
+    if candidates is not None:
+        return np.take_along_axis(aco.pheromones, candidates, axis=1)
+    n = aco.num_cities
+    return np.asarray(aco.pheromones)[~np.eye(n, dtype=bool)].reshape(n, n - 1)
@@ -0,0 +1,131 @@
+import numpy as np
+
+# Pheromone strategies for ACO(..., strategy=...). A strategy decides the initial trail level,
+# the global pheromone update after each iteration and, for ACS, how ants pick their next city
+# (q0) and the local update applied to every edge as it is traversed.
+# MMAS and ACS keep their own bookkeeping in the dense pheromone matrix, so they need
+# pheromone_storage='dense'.
+
+
+class AntSystem:
+    # The classic rule: every edge evaporates, every ant deposits q / tour length
+    name = 'as'
+    # Probability of taking the best-looking city instead of sampling (ACS only)
+    q0 = 0.0
+    local_update = False
+
+    def initial_pheromone(self, aco):
+        from aco import INITIAL_PHEROMONE
+        return INITIAL_PHEROMONE
+
+    def update_pheromones(self, aco, tours, distances):
+        aco.evaporate_pheromones(aco.evaporation_rate)
+        aco.deposit_pheromones(tours, distances)
+
+    def after_step(self, aco, from_cities, to_cities):
+        pass
+
+
+class MaxMinAntSystem(AntSystem):
+    # MAX-MIN Ant System (Stuetzle & Hoos): only the iteration-best tour deposits (the best-so-far
+    # tour every global_best_interval iterations), trails are kept within [tau_min, tau_max],
+    # and after restart_after iterations without improvement every trail goes back to tau_max.
+    name = 'mmas'
+
+    def __init__(self, p_best=0.05, restart_after=20, global_best_interval=25):
+        self.p_best = p_best
+        self.restart_after = restart_after
+        self.global_best_interval = global_best_interval
+
+    def initial_pheromone(self, aco):
+        # tau_max estimated from a nearest-neighbour tour
+        return self.tau_max(aco, nearest_neighbour_length(aco))
+
+    def tau_max(self, aco, best_distance):
+        return aco.q / (aco.evaporation_rate * best_distance)
+
+    def tau_min(self, aco, tau_max):
+        n = aco.num_cities
+        root = self.p_best ** (1.0 / n)
+        return tau_max * (1 - root) / (max(n / 2 - 1, 1) * root)
+
+    def update_pheromones(self, aco, tours, distances):
+        pheromones = aco.pheromones
+        stagnant = aco.iteration - aco.last_improvement_iter
+        tau_max = self.tau_max(aco, aco.best_distance)
+        if self.restart_after and stagnant > 0 and stagnant % self.restart_after == 0:
+            # In place, so views of the matrix (island model) see the restart
+            pheromones[...] = tau_max
+            return
+
+        aco.evaporate_pheromones(aco.evaporation_rate)
+        if self.global_best_interval and (aco.iteration + 1) % self.global_best_interval == 0:
+            aco.deposit_pheromones([aco.best_tour], [aco.best_distance])
+        else:
+            best = int(np.argmin(distances))
+            aco.deposit_pheromones([tours[best]], [distances[best]])
+        np.clip(pheromones, self.tau_min(aco, tau_max), tau_max, out=pheromones)
+
+
+class AntColonySystem(AntSystem):
+    # Ant Colony System (Dorigo & Gambardella): with probability q0 an ant takes the city with the
+    # largest tau^alpha * eta^beta, otherwise it samples as usual. Each traversed edge moves towards
+    # tau0 by xi as the ants go, and only the best-so-far tour's edges evaporate and receive deposit.
+    name = 'acs'
+    local_update = True
+
+    def __init__(self, q0=0.9, xi=0.1):
+        self.q0 = q0
+        self.xi = xi
+        self.tau0 = None
+
+    def initial_pheromone(self, aco):
+        self.tau0 = aco.q / (aco.num_cities * nearest_neighbour_length(aco))
+        return self.tau0
+
+    def update_pheromones(self, aco, tours, distances):
+        if aco.best_tour is None:
+            return
+        tour = np.asarray(aco.best_tour)
+        following = np.roll(tour, -1)
+        rho = aco.evaporation_rate
+        deposit = rho * aco.q / aco.best_distance
+        for rows, cols in ((tour, following), (following, tour)):
+            aco.pheromones[rows, cols] = (1 - rho) * aco.pheromones[rows, cols] + deposit
+
+    def after_step(self, aco, from_cities, to_cities):
+        # Local update of the edges just taken. When k ants share an edge in the same step the
+        # update is applied k times: tau0 + (1 - xi)^k * (tau - tau0).
+        lo = np.minimum(from_cities, to_cities)
+        hi = np.maximum(from_cities, to_cities)
+        keys, counts = np.unique(lo * aco.num_cities + hi, return_counts=True)
+        a, b = np.divmod(keys, aco.num_cities)
+        tau = aco.pheromones[a, b]
+        tau = self.tau0 + (1 - self.xi) ** counts * (tau - self.tau0)
+        aco.pheromones[a, b] = tau
+        aco.pheromones[b, a] = tau
+        aco.refresh_choice_info_edges(np.concatenate([a, b]), np.concatenate([b, a]))
+
+
+STRATEGIES = {
+    'as': AntSystem,
+    'mmas': MaxMinAntSystem,
+    'acs': AntColonySystem,
+}
+
+
+def make_strategy(strategy):
+    # A strategy object from a name in STRATEGIES (default parameters) or an instance
+    if strategy is None:
+        return AntSystem()
+    if isinstance(strategy, str):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"unknown strategy {strategy!r}")
+        return STRATEGIES[strategy]()
+    return strategy
+
+
+def nearest_neighbour_length(aco):
+    # Length of a greedy nearest-neighbour tour from city 0, used to scale the initial trails
+    from aco import nearest_neighbour_tour
+    return max(aco.calculate_tour_distance(nearest_neighbour_tour(aco.distances)), 1)
@@ -0,0 +1,234 @@
+import numpy as np
+
+# TSPLIB .tsp reader and .tour writer.
+# Supported EDGE_WEIGHT_TYPEs: EUC_2D, CEIL_2D, ATT, GEO and EXPLICIT (all symmetric formats).
+# Files are read line by line; sections are parsed straight into their final arrays.
+
+
+def nint(x):
+    return np.floor(x + 0.5)
+
+
+def euc_2d(a, b):
+    return nint(np.sqrt(((a - b) ** 2).sum(axis=-1)))
+
+
+def ceil_2d(a, b):
+    return np.ceil(np.sqrt(((a - b) ** 2).sum(axis=-1)))
+
+
+def att(a, b):
+    # Pseudo-Euclidean distance of the att48/att532 instances
+    r = np.sqrt(((a - b) ** 2).sum(axis=-1) / 10.0)
+    t = nint(r)
+    return np.where(t < r, t + 1, t)
+
+
+def geo(a, b):
+    # Great-circle distance in km; coordinates are DDD.MM latitude/longitude as in TSPLIB
+    def radians(x):
+        degrees = np.trunc(x)
+        return 3.141592 * (degrees + 5.0 * (x - degrees) / 3.0) / 180.0
+
+    lat_a, lon_a = radians(a[..., 0]), radians(a[..., 1])
+    lat_b, lon_b = radians(b[..., 0]), radians(b[..., 1])
+    q1 = np.cos(lon_a - lon_b)
+    q2 = np.cos(lat_a - lat_b)
+    q3 = np.cos(lat_a + lat_b)
+    d = np.trunc(6378.388 * np.arccos(np.clip(0.5 * ((1.0 + q1) * q2 - (1.0 - q1) * q3), -1.0, 1.0)) + 1.0)
+    # TSPLIB's formula gives 1 for a city and itself; keep the diagonal at 0
+    return np.where((a == b).all(axis=-1), 0.0, d)
+
+
+METRICS = {
+    'EUC_2D': euc_2d,
+    'CEIL_2D': ceil_2d,
+    'ATT': att,
+    'GEO': geo,
+}
+
+# Symmetric EDGE_WEIGHT_FORMATs mapped to the row-wise layout they are equivalent to:
+# a column-wise upper triangle lists the same numbers as a row-wise lower triangle.
+WEIGHT_FORMATS = {
+    'FULL_MATRIX': 'FULL_MATRIX',
+    'UPPER_ROW': 'UPPER_ROW',
+    'LOWER_ROW': 'LOWER_ROW',
+    'UPPER_DIAG_ROW': 'UPPER_DIAG_ROW',
+    'LOWER_DIAG_ROW': 'LOWER_DIAG_ROW',
+    'UPPER_COL': 'LOWER_ROW',
+    'LOWER_COL': 'UPPER_ROW',
+    'UPPER_DIAG_COL': 'LOWER_DIAG_ROW',
+    'LOWER_DIAG_COL': 'UPPER_DIAG_ROW',
+}
+
+
+class TSPInstance:
+    def __init__(self, name, dimension, edge_weight_type, coords=None, weights=None, comment=''):
+        self.name = name
+        self.dimension = dimension
+        self.edge_weight_type = edge_weight_type
+        # (n, 2) node or display coordinates, or None
+        self.coords = coords
+        # (n, n) matrix from an EXPLICIT EDGE_WEIGHT_SECTION, or None
+        self.weights = weights
+        self.comment = comment
+
+    @property
+    def metric(self):
+        return METRICS.get(self.edge_weight_type)
+
+    def solver_kwargs(self):
+        # Keyword arguments for ACO(...) that make it use this instance
+        if self.weights is not None:
+            return {'cities': self.coords, 'distances': self.weights}
+        return {'cities': self.coords, 'distance_metric': self.metric}
+
+    def tour_length(self, tour):
+        # Length of a closed tour under this instance's distance function
+        tour = np.asarray(tour)
+        following = np.roll(tour, -1)
+        if self.weights is not None:
+            return int(self.weights[tour, following].sum())
+        return int(self.metric(self.coords[tour], self.coords[following]).sum())
+
+
+def load_tsp(path, dtype=np.float64):
+    header = {}
+    coords = None
+    weights = None
+
+    with open(path) as lines:
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            keyword = line.split(':', 1)[0].split()[0].upper()
+            if keyword == 'EOF':
+                break
+            if keyword in ('NODE_COORD_SECTION', 'DISPLAY_DATA_SECTION'):
+                section_coords = _read_coords(lines, _dimension(header))
+                # Node coordinates take precedence over display-only coordinates
+                if keyword == 'NODE_COORD_SECTION' or coords is None:
+                    coords = section_coords
+            elif keyword == 'EDGE_WEIGHT_SECTION':
+                weight_format = header.get('EDGE_WEIGHT_FORMAT', 'FULL_MATRIX').upper()
+                if weight_format not in WEIGHT_FORMATS:
+                    raise ValueError(f"unsupported EDGE_WEIGHT_FORMAT {weight_format}")
+                weights = _read_weights(lines, _dimension(header), WEIGHT_FORMATS[weight_format], dtype)
+            elif keyword.endswith('_SECTION'):
+                _skip_section(lines)
+            elif ':' in line:
+                key, value = line.split(':', 1)
+                header[key.strip().upper()] = value.strip()
+
+    problem_type = header.get('TYPE', 'TSP').split()[0].upper()
+    if problem_type != 'TSP':
+        raise ValueError(f"only symmetric TSP instances are supported, got TYPE {problem_type}")
+    edge_weight_type = header.get('EDGE_WEIGHT_TYPE', 'EXPLICIT').upper()
+    if edge_weight_type == 'EXPLICIT':
+        if weights is None:
+            raise ValueError("EXPLICIT instance without an EDGE_WEIGHT_SECTION")
+    elif edge_weight_type not in METRICS:
+        raise ValueError(f"unsupported EDGE_WEIGHT_TYPE {edge_weight_type}")
+    elif coords is None:
+        raise ValueError("instance has no NODE_COORD_SECTION")
+
+    return TSPInstance(header.get('NAME', ''), _dimension(header), edge_weight_type,
+                       coords=coords, weights=weights, comment=header.get('COMMENT', ''))
+
+
+def _dimension(header):
+    if 'DIMENSION' not in header:
+        raise ValueError("DIMENSION must come before the data sections")
+    return int(header['DIMENSION'])
+
+
+def _read_coords(lines, n):
+    coords = np.empty((n, 2))
+    read = 0
+    for line in lines:
+        fields = line.split()
+        if not fields:
+            continue
+        index = int(fields[0]) - 1
+        coords[index] = float(fields[1]), float(fields[2])
+        read += 1
+        if read == n:
+            return coords
+    raise ValueError(f"coordinate section ended after {read} of {n} nodes")
+
+
+def _row_segments(weight_format, n):
+    # (row, first column, end column) of each run of numbers, in file order
+    for row in range(n):
+        if weight_format == 'FULL_MATRIX':
+            yield row, 0, n
+        elif weight_format == 'UPPER_ROW':
+            yield row, row + 1, n
+        elif weight_format == 'UPPER_DIAG_ROW':
+            yield row, row, n
+        elif weight_format == 'LOWER_ROW':
+            yield row, 0, row
+        elif weight_format == 'LOWER_DIAG_ROW':
+            yield row, 0, row + 1
+
+
+def _read_weights(lines, n, weight_format, dtype):
+    matrix = np.zeros((n, n), dtype=dtype)
+    segments = _row_segments(weight_format, n)
+    mirror = weight_format != 'FULL_MATRIX'
+    pending = np.empty(0)
+
+    row, start, stop = next(segments)
+    while True:
+        # Fill every row segment the buffered numbers cover, then read more
+        while len(pending) >= stop - start:
+            values, pending = pending[:stop - start], pending[stop - start:]
+            matrix[row, start:stop] = values
+            if mirror:
+                matrix[start:stop, row] = values
+            try:
+                row, start, stop = next(segments)
+            except StopIteration:
+                return matrix
+        line = next(lines, None)
+        if line is None:
+            raise ValueError("EDGE_WEIGHT_SECTION ended early")
+        fields = line.split()
+        if fields:
+            pending = np.concatenate([pending, np.array(fields, dtype=float)])
+
+
+def _skip_section(lines):
+    # Sections we do not use (FIXED_EDGES_SECTION, TOUR_SECTION, ...) end with -1
+    for line in lines:
+        if line.split()[-1:] == ['-1']:
+            return
+
+
+def load_tour(path):
+    # 0-based city order from a TSPLIB .tour file
+    tour = []
+    with open(path) as lines:
+        for line in lines:
+            if line.strip().upper().startswith('TOUR_SECTION'):
+                for entry in lines:
+                    for field in entry.split():
+                        if int(field) == -1:
+                            return tour
+                        tour.append(int(field) - 1)
+    return tour
+
+
+def write_tour(path, tour, name='', comment=None):
+    # TSPLIB .tour file with 1-based city ids
+    with open(path, 'w') as f:
+        f.write(f"NAME : {name}\n")
+        if comment:
+            f.write(f"COMMENT : {comment}\n")
+        f.write("TYPE : TOUR\n")
+        f.write(f"DIMENSION : {len(tour)}\n")
+        f.write("TOUR_SECTION\n")
+        for city in tour:
+            f.write(f"{int(city) + 1}\n")
+        f.write("-1\nEOF\n")